@@ -0,0 +1,211 @@
+"""Remote executor agent.
+
+Registers with the workflow API, pulls queued node runs over HTTP, executes
+them with the regular node handlers and streams their output back.
+
+    python agent.py --server http://127.0.0.1:5000 --name builder-1 --labels docker
+
+Labels for tools found on PATH (git, npm, pip, ...) are added automatically.
+Several agents can run side by side, on one machine or many.
+"""
+import json
+import time
+import shutil
+import socket
+import asyncio
+import logging
+import argparse
+import threading
+import urllib.error
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+# Tools whose presence on PATH becomes a capability label
+DETECTED_TOOLS = ('git', 'pip', 'npm', 'node', 'docker', 'make')
+# Seconds between output reports; each report also tells the agent about cancels
+FLUSH_INTERVAL = 1.0
+# Attempts at reporting a finished task's result, with exponential backoff in between
+COMPLETE_ATTEMPTS = 6
+MAX_RETRY_DELAY = 30.0
+
+
+def detect_labels():
+    """Capability labels for the tools installed on this machine"""
+    return [tool for tool in DETECTED_TOOLS if shutil.which(tool)]
+
+
+class AgentClient:
+    """Agent that claims and runs node tasks from the workflow API"""
+
+    def __init__(self, server, name, labels, poll_interval=2.0):
+        self.server = server.rstrip('/')
+        self.name = name
+        self.labels = sorted(set(labels))
+        self.poll_interval = poll_interval
+        self.agent_id = None
+        self._stop = threading.Event()
+
+    def _request(self, method, path, payload=None):
+        """Send a JSON request; returns (status code, decoded body or None)"""
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        req = urllib.request.Request(self.server + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                body = response.read()
+                return response.status, json.loads(body) if body else None
+        except urllib.error.HTTPError as e:
+            body = e.read()
+            try:
+                return e.code, json.loads(body) if body else None
+            except ValueError:
+                return e.code, None
+
+    def register(self):
+        """Register with the API and remember the assigned agent id"""
+        status, body = self._request('POST', '/api/agents', {'name': self.name, 'labels': self.labels})
+        if status != 201:
+            raise RuntimeError(f"Agent registration failed ({status}): {body}")
+        self.agent_id = body['id']
+        logger.info(f"Registered as agent {self.agent_id} with labels {self.labels}")
+
+    def claim(self):
+        """Claim the next task this agent can run, or None"""
+        status, body = self._request('POST', f'/api/agents/{self.agent_id}/claim')
+        if status == 200:
+            return body
+        if status != 204:
+            logger.error(f"Claim failed ({status}): {body}")
+        return None
+
+    def run_forever(self):
+        """Claim and run tasks until stop() is called"""
+        if self.agent_id is None:
+            self.register()
+
+        while not self._stop.is_set():
+            try:
+                task = self.claim()
+            except (urllib.error.URLError, OSError) as e:
+                logger.error(f"Server unreachable: {str(e)}")
+                task = None
+
+            if task is None:
+                self._stop.wait(self.poll_interval)
+                continue
+
+            try:
+                asyncio.run(self.run_task(task))
+            except Exception as e:
+                # One failed task must not stop the agent
+                logger.error(f"Task {task.get('id')} failed in the agent: {str(e)}")
+
+    def stop(self):
+        self._stop.set()
+
+    def report_result(self, task_id, result):
+        """Post a task's final result, retrying while the server is unreachable"""
+        delay = 1.0
+        for attempt in range(1, COMPLETE_ATTEMPTS + 1):
+            try:
+                return self._request('POST', f'/api/agent-tasks/{task_id}/complete', result)
+            except (urllib.error.URLError, OSError) as e:
+                logger.warning(f"Failed to report result of task {task_id} (attempt {attempt}): {str(e)}")
+            if attempt < COMPLETE_ATTEMPTS:
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+        logger.error(f"Gave up reporting result of task {task_id}")
+        return None, None
+
+    async def run_task(self, task):
+        """Run one claimed task, streaming output and reporting the result"""
+        # Imported here so --help works without the app's dependencies
+        from async_executor import AsyncNodeExecutor
+        from cancellation import CancellationToken, ExecutionCancelled
+        import node_types
+
+        task_id = task['id']
+        token = CancellationToken()
+        buffer = []
+        logger.info(f"Running task {task_id} ({task['node_type']})")
+
+        def report_output(output):
+            try:
+                status, body = self._request('POST', f'/api/agent-tasks/{task_id}/output',
+                                             {'agent_id': self.agent_id, 'output': output})
+            except (urllib.error.URLError, OSError) as e:
+                logger.error(f"Failed to report output of task {task_id}: {str(e)}")
+                return
+            if status in (200, 409) and body and body.get('cancel_requested'):
+                token.cancel()
+
+        async def flush():
+            # Output lines are appended on the loop thread, so take them here
+            output = ''.join(buffer)
+            buffer.clear()
+            await asyncio.to_thread(report_output, output)
+
+        async def flush_periodically():
+            while True:
+                await asyncio.sleep(FLUSH_INTERVAL)
+                await flush()
+
+        executor = AsyncNodeExecutor(on_output=lambda node, stream, line: buffer.append(line))
+        flusher = asyncio.ensure_future(flush_periodically())
+
+        result = {'success': False}
+        try:
+            config = task['configuration']
+            node_types.validate_config(task['node_type'], config)
+            handler = executor.node_types[task['node_type']]
+            output = await executor._drive_async(handler, config, None, token)
+            result = {'success': True, 'output': output.get('output', '')}
+        except ExecutionCancelled as e:
+            result = {'success': False, 'cancelled': True, 'error': str(e)}
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        finally:
+            flusher.cancel()
+
+        if buffer:
+            await flush()
+        result['agent_id'] = self.agent_id
+        status, body = await asyncio.to_thread(self.report_result, task_id, result)
+        if status == 409:
+            logger.warning(f"Result of task {task_id} rejected: {body.get('error') if body else status}")
+        logger.info(f"Task {task_id} finished: {'success' if result['success'] else result.get('error')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a remote executor agent')
+    parser.add_argument('--server', default='http://127.0.0.1:5000', help='workflow API base URL')
+    parser.add_argument('--name', default=socket.gethostname(), help='agent name')
+    parser.add_argument('--labels', default='', help='comma-separated extra capability labels')
+    parser.add_argument('--no-detect', action='store_true', help='do not add labels for tools found on PATH')
+    parser.add_argument('--poll-interval', type=float, default=2.0, help='seconds to wait when the queue is empty')
+    parser.add_argument('--concurrency', type=int, default=1, help='tasks to run at once')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    labels = [label.strip() for label in args.labels.split(',') if label.strip()]
+    if not args.no_detect:
+        labels += detect_labels()
+
+    agent = AgentClient(args.server, args.name, labels, args.poll_interval)
+    agent.register()
+
+    # Extra workers share one registration, each with its own claim loop
+    workers = [threading.Thread(target=agent.run_forever, daemon=True) for _ in range(args.concurrency - 1)]
+    for worker in workers:
+        worker.start()
+
+    try:
+        agent.run_forever()
+    except KeyboardInterrupt:
+        agent.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+import bisect
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import update, case, or_
+from database import db, insert_ignore
+from models import ExecutionStats, NodeExecution, WorkflowExecution
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the duration histogram bins; the last bin is open-ended
+DURATION_BOUNDS = (1, 5, 15, 30, 60, 120, 300, 600, 1800)
+HISTOGRAM_BINS = len(DURATION_BOUNDS) + 1
+
+STATUS_COLUMNS = {
+    'success': 'success_count',
+    'error': 'error_count',
+    'cancelled': 'cancelled_count'
+}
+
+GRANULARITIES = {
+    'hour': lambda ts: ts.replace(minute=0, second=0, microsecond=0),
+    'day': lambda ts: ts.replace(hour=0, minute=0, second=0, microsecond=0)
+}
+
+
+def bucket_start(timestamp):
+    """Truncate a timestamp to its hourly stats bucket"""
+    return GRANULARITIES['hour'](timestamp)
+
+
+def histogram_bin(duration):
+    """Index of the histogram bin a duration falls into"""
+    return bisect.bisect_left(DURATION_BOUNDS, duration)
+
+
+def record_execution(scope, subject_id, execution):
+    """Fold a finished execution into its hourly stats bucket.
+
+    Counters are incremented in SQL so concurrent writers never lose updates.
+    Runs in a savepoint of the caller's transaction; on failure only the
+    savepoint is rolled back and the error is logged, so analytics can never
+    fail an execution.
+    """
+    column = STATUS_COLUMNS.get(execution.status)
+    if column is None or execution.end_time is None:
+        return
+
+    start_time = execution.start_time or execution.end_time
+    duration = max(0.0, (execution.end_time - start_time).total_seconds())
+    key = {'scope': scope, 'subject_id': subject_id, 'bucket_start': bucket_start(start_time)}
+    hist_column = f'hist_{histogram_bin(duration)}'
+
+    try:
+        with db.session.begin_nested():
+            insert_ignore(ExecutionStats, key, ['scope', 'subject_id', 'bucket_start'])
+            db.session.execute(
+                update(ExecutionStats)
+                .where(ExecutionStats.scope == scope,
+                       ExecutionStats.subject_id == subject_id,
+                       ExecutionStats.bucket_start == key['bucket_start'])
+                .values({
+                    column: getattr(ExecutionStats, column) + 1,
+                    hist_column: getattr(ExecutionStats, hist_column) + 1,
+                    'duration_sum': ExecutionStats.duration_sum + duration,
+                    'duration_max': case((ExecutionStats.duration_max < duration, duration),
+                                         else_=ExecutionStats.duration_max),
+                    'duration_min': case((or_(ExecutionStats.duration_min.is_(None),
+                                              ExecutionStats.duration_min > duration), duration),
+                                         else_=ExecutionStats.duration_min)
+                })
+            )
+    except Exception as e:
+        logger.error(f"Failed to record {scope} {subject_id} execution stats: {str(e)}")
+
+
+def estimate_percentile(histogram, q, duration_max, duration_min=0.0):
+    """Estimate the q-th percentile (0-1) duration from histogram bin counts.
+
+    The observed minimum and maximum narrow the first and last occupied bins,
+    so short executions are not interpolated down towards zero.
+    """
+    total = sum(histogram)
+    if not total:
+        return None
+
+    rank = q * total
+    cumulative = 0
+    for index, count in enumerate(histogram):
+        if count and cumulative + count >= rank:
+            lower = DURATION_BOUNDS[index - 1] if index > 0 else 0.0
+            upper = DURATION_BOUNDS[index] if index < len(DURATION_BOUNDS) else duration_max
+            upper = min(upper, duration_max)
+            lower = min(max(lower, duration_min), upper)
+            # Interpolate linearly within the bin
+            return lower + (upper - lower) * (rank - cumulative) / count
+        cumulative += count
+    return duration_max
+
+
+def summarize(rows):
+    """Combine stats buckets into totals, failure rate and duration percentiles"""
+    histogram = [0] * HISTOGRAM_BINS
+    counts = {status: 0 for status in STATUS_COLUMNS}
+    duration_sum = 0.0
+    duration_max = 0.0
+    duration_min = None
+
+    for row in rows:
+        for status, column in STATUS_COLUMNS.items():
+            counts[status] += getattr(row, column) or 0
+        for index, count in enumerate(row.histogram):
+            histogram[index] += count
+        duration_sum += row.duration_sum or 0.0
+        duration_max = max(duration_max, row.duration_max or 0.0)
+        row_min = row.duration_min or 0.0
+        duration_min = row_min if duration_min is None else min(duration_min, row_min)
+
+    total = sum(counts.values())
+    return {
+        'total': total,
+        'counts': counts,
+        'failure_rate': counts['error'] / total if total else None,
+        'duration': {
+            'mean': duration_sum / total if total else None,
+            'min': duration_min if total else None,
+            'max': duration_max if total else None,
+            'p50': estimate_percentile(histogram, 0.50, duration_max, duration_min or 0.0),
+            'p95': estimate_percentile(histogram, 0.95, duration_max, duration_min or 0.0),
+            'p99': estimate_percentile(histogram, 0.99, duration_max, duration_min or 0.0)
+        },
+        'histogram': {
+            'bounds': list(DURATION_BOUNDS),
+            'counts': histogram
+        }
+    }
+
+
+def query_stats(scope, subject_id=None, since=None, until=None):
+    """Load the stats buckets for a scope (and optionally one subject) in a time range"""
+    query = ExecutionStats.query.filter_by(scope=scope)
+    if subject_id is not None:
+        query = query.filter_by(subject_id=subject_id)
+    if since is not None:
+        query = query.filter(ExecutionStats.bucket_start >= bucket_start(since))
+    if until is not None:
+        query = query.filter(ExecutionStats.bucket_start < until)
+    return query.order_by(ExecutionStats.bucket_start).all()
+
+
+def subject_report(scope, subject_id, since=None, until=None, granularity=None):
+    """Summary for a single node or workflow, optionally with a per-bucket series"""
+    rows = query_stats(scope, subject_id, since, until)
+    report = summarize(rows)
+
+    if granularity:
+        truncate = GRANULARITIES[granularity]
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(truncate(row.bucket_start), []).append(row)
+        report['series'] = [
+            dict(summarize(group), bucket_start=start.isoformat())
+            for start, group in sorted(grouped.items())
+        ]
+
+    return report
+
+
+def scope_report(scope, since=None, until=None):
+    """Summary per subject for every node or workflow with executions in range"""
+    grouped = {}
+    for row in query_stats(scope, since=since, until=until):
+        grouped.setdefault(row.subject_id, []).append(row)
+    return {subject_id: summarize(rows) for subject_id, rows in grouped.items()}
+
+
+def default_since(days=7):
+    """Start of the default reporting window"""
+    return datetime.utcnow() - timedelta(days=days)
+
+
+def rebuild_stats():
+    """Recompute all stats from execution history (e.g. after enabling analytics)"""
+    ExecutionStats.query.delete()
+    finished = ('success', 'error', 'cancelled')
+
+    node_rows = db.session.query(
+        NodeExecution.node_id, NodeExecution.status, NodeExecution.start_time, NodeExecution.end_time
+    ).filter(NodeExecution.status.in_(finished)).all()
+    workflow_rows = db.session.query(
+        WorkflowExecution.workflow_id, WorkflowExecution.status, WorkflowExecution.start_time, WorkflowExecution.end_time
+    ).filter(WorkflowExecution.status.in_(finished)).all()
+
+    for row in node_rows:
+        record_execution('node', row.node_id, row)
+    for row in workflow_rows:
+        record_execution('workflow', row.workflow_id, row)
+    count = len(node_rows) + len(workflow_rows)
+
+    db.session.commit()
+    return count
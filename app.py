@@ -1,5 +1,6 @@
 import os
 import logging
+import click
 from flask import Flask
 from werkzeug.middleware.proxy_fix import ProxyFix
 from database import db
@@ -7,30 +8,91 @@ from database import db
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 
-# Create the app
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
-
-# Configure the database
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///workflow.db")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-
-# Initialize the app with the extension
-db.init_app(app)
-
-# Initialize database and routes after app setup
-with app.app_context():
-    # Import models to ensure tables are created
-    from models import Node, Workflow, WorkflowStep, NodeExecution, WorkflowExecution  # noqa: F401
+
+def create_app(config=None):
+    """Create and configure the Flask application.
+    
+    Nothing here touches the database or imports the executors: tables are
+    created by the `init-db` command and executors are built on first use, so
+    worker and CLI startup stay cheap.
+    """
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+    
+    # Configure the database
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///workflow.db")
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+    }
+    
+    # Node executor backend: "sync" (blocking subprocess) or "async" (asyncio subprocesses)
+    app.config["NODE_EXECUTOR_BACKEND"] = os.environ.get("NODE_EXECUTOR_BACKEND", "sync")
+    
+    # Start the workflow scheduler thread with the app (or use the run-scheduler command)
+    app.config["SCHEDULER_ENABLED"] = os.environ.get("SCHEDULER_ENABLED", "").lower() in ("1", "true", "yes")
+    
+    if config:
+        app.config.update(config)
+    
+    # Initialize the app with the extension
+    db.init_app(app)
+    
+    # Register blueprints
+    from routes import bp
+    app.register_blueprint(bp)
+    
+    from scheduler import scheduler
+    scheduler.init_app(app)
+    
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(rebuild_stats_command)
+    app.cli.add_command(run_scheduler_command)
+    
+    return app
+
+
+def init_db():
+    """Create any missing tables and upgrade existing ones"""
+    # Import models so they are registered on the metadata
+    import models  # noqa: F401
+    import migrations
     db.create_all()
+    migrations.upgrade()
+
+
+@click.command('init-db')
+def init_db_command():
+    """Create or upgrade the database schema."""
+    init_db()
+    click.echo('Initialized the database.')
+
+
+@click.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute execution analytics from execution history."""
+    import analytics
+    count = analytics.rebuild_stats()
+    click.echo(f'Rebuilt stats from {count} executions.')
+
+
+
+@click.command('run-scheduler')
+def run_scheduler_command():
+    """Run the workflow scheduler in the foreground."""
+    from scheduler import scheduler
+    scheduler.start()
+    click.echo('Scheduler running, press Ctrl+C to stop.')
+    try:
+        while scheduler.running:
+            scheduler.join(1)
+    except KeyboardInterrupt:
+        scheduler.stop()
 
-# Register blueprints
-from routes import bp
-app.register_blueprint(bp)
 
 if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        init_db()
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,86 @@
+import asyncio
+import inspect
+import logging
+from database import db
+from node_executor import NodeExecutor
+from command_runner import run_command_async
+import cancellation
+from cancellation import ExecutionCancelled
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on subprocesses supervised at once by execute_nodes
+DEFAULT_CONCURRENCY = 256
+
+
+class AsyncNodeExecutor(NodeExecutor):
+    """asyncio backend for NodeExecutor.
+
+    Runs the same node handlers, but every Command they yield is executed with
+    asyncio.create_subprocess_exec, so a single thread can supervise many
+    concurrent shell/git/install steps. Handlers that do not spawn processes
+    (env_setup, file_operation) run in a worker thread.
+    """
+
+    def __init__(self, on_output=None):
+        super().__init__()
+        self.on_output = on_output
+
+    async def execute_node(self, node, parameters=None, token=None):
+        """Execute a node with given parameters"""
+        execution, token = self._start_execution(node, parameters, token)
+
+        try:
+            handler, config = self._prepare(node, parameters)
+            result = await self._drive_async(handler, config, node, token)
+            return self._finish_success(execution, node, result)
+
+        except asyncio.CancelledError:
+            self._finish_error(execution, node, ExecutionCancelled())
+            raise
+
+        except Exception as e:
+            return self._finish_error(execution, node, e)
+
+        finally:
+            cancellation.unregister('node', execution.id)
+            db.session.commit()
+
+    async def execute_nodes(self, runs, concurrency=DEFAULT_CONCURRENCY, token=None):
+        """Execute several (node, parameters) pairs concurrently.
+
+        Returns the results in the same order as runs. A cancelled run frees
+        its semaphore slot as soon as its process tree has been killed.
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_one(node, parameters):
+            async with semaphore:
+                return await self.execute_node(node, parameters, token)
+
+        return await asyncio.gather(*(run_one(node, parameters) for node, parameters in runs))
+
+    def run(self, node, parameters=None, token=None):
+        """Blocking entry point for callers that are not running an event loop"""
+        return asyncio.run(self.execute_node(node, parameters, token))
+
+    async def _drive_async(self, handler, config, node, token):
+        """Run a handler, awaiting each Command it yields"""
+        token.check()
+        if not inspect.isgeneratorfunction(handler):
+            return await asyncio.to_thread(handler, config)
+
+        on_output = None
+        if self.on_output:
+            on_output = lambda stream, line: self.on_output(node, stream, line)  # noqa: E731
+
+        steps = handler(config)
+        try:
+            command = next(steps)
+            while True:
+                result = await run_command_async(command, on_output, token)
+                command = steps.send(result)
+        except StopIteration as stop:
+            return stop.value
@@ -0,0 +1,58 @@
+"""Benchmark application boot time.
+
+Each sample starts a fresh interpreter, imports the app module and calls
+create_app(), which is what every gunicorn worker and `flask` CLI call pays.
+
+    python bench_startup.py [--runs N]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+BOOT_SNIPPET = (
+    "import time; t = time.perf_counter();"
+    "from app import create_app; create_app();"
+    "print(time.perf_counter() - t)"
+)
+
+
+def measure(runs):
+    """Return (in-process boot times, total process times) in seconds"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite://')
+
+    boot_times = []
+    process_times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', BOOT_SNIPPET], cwd=here, env=env,
+                                capture_output=True, text=True, check=True)
+        process_times.append(time.perf_counter() - start)
+        boot_times.append(float(result.stdout.strip().splitlines()[-1]))
+    return boot_times, process_times
+
+
+def summarize(label, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{label:<16} mean {statistics.mean(samples) * 1000:8.1f} ms   "
+          f"median {statistics.median(samples) * 1000:8.1f} ms   p95 {p95 * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark application boot time')
+    parser.add_argument('--runs', type=int, default=10, help='number of fresh interpreters to start')
+    args = parser.parse_args()
+
+    boot_times, process_times = measure(args.runs)
+    print(f"{args.runs} runs")
+    summarize('create_app()', boot_times)
+    summarize('process total', process_times)
+
+
+if __name__ == '__main__':
+    main()
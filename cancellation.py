@@ -0,0 +1,171 @@
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between two runs of a token's poll check
+POLL_INTERVAL = 1.0
+
+
+class ExecutionCancelled(RuntimeError):
+    """Raised when a node or workflow execution is cancelled"""
+
+    def __init__(self, message='Execution cancelled'):
+        super().__init__(message)
+
+
+class DeadlineExceeded(RuntimeError):
+    """Raised when a workflow-level deadline runs out"""
+
+    def __init__(self, message='Workflow deadline exceeded'):
+        super().__init__(message)
+
+
+class CancellationToken:
+    """Cancellation flag and optional deadline shared by everything an execution runs.
+
+    Child tokens inherit the parent's deadline and are cancelled with it, so a
+    workflow cancel reaches the step that is currently running while a single
+    step can still be cancelled on its own.
+
+    A cancel made by another process only reaches the database, so executors
+    install a poll check that looks there; long-running work calls poll().
+    """
+
+    def __init__(self, deadline=None, parent=None):
+        self.deadline = deadline  # time.monotonic() value, or None for no deadline
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._parent = parent
+        self._remove_from_parent = None
+        self._poll_check = None
+        self._next_poll = 0.0
+        if parent is not None:
+            if parent.deadline is not None and (deadline is None or parent.deadline < deadline):
+                self.deadline = parent.deadline
+            self._remove_from_parent = parent.add_callback(self.cancel)
+
+    @classmethod
+    def with_timeout(cls, timeout, parent=None):
+        """Create a token whose deadline is timeout seconds from now"""
+        deadline = time.monotonic() + timeout if timeout else None
+        return cls(deadline=deadline, parent=parent)
+
+    def child(self):
+        """Create a token cancelled together with this one"""
+        return CancellationToken(parent=self)
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        """Cancel the token and run its callbacks once"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Cancellation callback failed: {str(e)}")
+
+    def wait(self, timeout):
+        """Sleep up to timeout seconds, waking early on cancel; returns True if cancelled"""
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback):
+        """Register callback to run on cancel; returns a function that unregisters it"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._discard(callback)
+        callback()
+        return lambda: None
+
+    def _discard(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def release(self):
+        """Detach from the parent token once the execution has finished"""
+        self._parent = None
+        if self._remove_from_parent:
+            self._remove_from_parent()
+            self._remove_from_parent = None
+
+    def set_poll(self, check):
+        """Install check(), returning True when the execution was cancelled elsewhere"""
+        self._poll_check = check
+
+    def poll(self):
+        """Run this token's and its ancestors' poll checks, cancelling on a hit; returns cancelled"""
+        if not self.cancelled and self._parent is not None:
+            self._parent.poll()  # A hit there cancels this token through its callback
+        if not self.cancelled and self._poll_check is not None:
+            now = time.monotonic()
+            if now >= self._next_poll:
+                self._next_poll = now + POLL_INTERVAL
+                try:
+                    if self._poll_check():
+                        self.cancel()
+                except Exception as e:
+                    logger.error(f"Cancellation poll failed: {str(e)}")
+        return self.cancelled
+
+    def remaining(self):
+        """Seconds left before the deadline, or None when there is no deadline"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def timeout_for(self, timeout):
+        """Clamp a step's own timeout to the remaining deadline budget"""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+    def deadline_exceeded(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def check(self):
+        """Raise if the execution was cancelled or is out of time"""
+        if self.cancelled:
+            raise ExecutionCancelled()
+        if self.deadline_exceeded():
+            raise DeadlineExceeded()
+
+
+# Tokens of executions running in this process, keyed by (kind, execution id)
+_active_tokens = {}
+_registry_lock = threading.Lock()
+
+
+def register(kind, execution_id, token):
+    with _registry_lock:
+        _active_tokens[(kind, execution_id)] = token
+
+
+def unregister(kind, execution_id):
+    with _registry_lock:
+        token = _active_tokens.pop((kind, execution_id), None)
+    if token:
+        token.release()
+
+
+def cancel(kind, execution_id):
+    """Cancel a running execution; returns False if it is not running in this process"""
+    with _registry_lock:
+        token = _active_tokens.get((kind, execution_id))
+    if not token:
+        return False
+    token.cancel()
+    return True
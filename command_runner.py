@@ -0,0 +1,203 @@
+import os
+import time
+import signal
+import asyncio
+import subprocess
+import logging
+from cancellation import ExecutionCancelled, POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Each command gets its own process group so a kill also reaches grandchildren
+# (e.g. everything a `shell=True` command started), not just the shell itself.
+NEW_SESSION = os.name == 'posix'
+
+
+class Command:
+    """A subprocess invocation requested by a node handler.
+
+    Handlers yield Command objects instead of calling subprocess directly so the
+    same handler can be driven by the synchronous or the asyncio backend.
+    """
+
+    def __init__(self, args, timeout=300, shell=False, cwd=None):
+        self.args = args
+        self.timeout = timeout
+        self.shell = shell
+        self.cwd = cwd
+
+    def __repr__(self):
+        return f"Command({self.args!r}, timeout={self.timeout})"
+
+
+def kill_process_tree(process):
+    """Kill a subprocess together with every process in its group"""
+    try:
+        if NEW_SESSION:
+            # The group can outlive its leader, so signal it even if the shell exited
+            os.killpg(process.pid, signal.SIGKILL)
+        elif process.returncode is None:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+def _check_stopped(command, token, timeout, stdout, stderr):
+    """Translate a killed command into the matching exception"""
+    if token is not None:
+        token.check()
+    raise subprocess.TimeoutExpired(command.args, timeout, output=stdout, stderr=stderr)
+
+
+def _wait_slice(deadline):
+    """Seconds to wait before polling the token again, never past the deadline"""
+    if deadline is None:
+        return POLL_INTERVAL
+    return max(0.0, min(POLL_INTERVAL, deadline - time.monotonic()))
+
+
+def run_command(command, token=None):
+    """Run a command synchronously, blocking the calling thread.
+
+    The command's timeout is clamped to the token's remaining deadline, and
+    cancelling the token kills the whole process tree immediately. While it
+    runs the token is polled, so a cancel from another process also kills it.
+    """
+    timeout = command.timeout
+    if token is not None:
+        token.check()
+        timeout = token.timeout_for(timeout)
+
+    process = subprocess.Popen(
+        command.args,
+        shell=command.shell,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=command.cwd,
+        start_new_session=NEW_SESSION
+    )
+    remove_callback = token.add_callback(lambda: kill_process_tree(process)) if token is not None else None
+    deadline = time.monotonic() + timeout if timeout is not None else None
+
+    try:
+        while True:
+            try:
+                stdout, stderr = process.communicate(timeout=_wait_slice(deadline))
+                break
+            except subprocess.TimeoutExpired:
+                if deadline is not None and time.monotonic() >= deadline:
+                    kill_process_tree(process)
+                    stdout, stderr = process.communicate()
+                    _check_stopped(command, token, timeout, stdout, stderr)
+                if token is not None:
+                    # A cancel found here kills the tree through the callback above
+                    token.poll()
+    finally:
+        if remove_callback:
+            remove_callback()
+        if process.poll() is None:
+            kill_process_tree(process)
+            process.wait()
+
+    if token is not None and token.cancelled:
+        raise ExecutionCancelled()
+
+    return subprocess.CompletedProcess(command.args, process.returncode, stdout, stderr)
+
+
+async def _read_stream(stream, name, chunks, on_output):
+    """Collect a subprocess stream line by line, forwarding each line to on_output"""
+    while True:
+        line = await stream.readline()
+        if not line:
+            break
+        text = line.decode(errors='replace')
+        chunks.append(text)
+        if on_output:
+            on_output(name, text)
+
+
+async def _kill(process):
+    """Kill a subprocess tree and reap it"""
+    kill_process_tree(process)
+    await process.wait()
+
+
+async def run_command_async(command, on_output=None, token=None):
+    """Run a command on the event loop, streaming output as it arrives.
+
+    on_output, if given, is called with ('stdout' | 'stderr', line) for every
+    line. A timeout raises subprocess.TimeoutExpired, matching run_command;
+    cancelling the token or the awaiting task kills the process tree. The
+    token is polled while the command runs, as in run_command.
+    """
+    timeout = command.timeout
+    if token is not None:
+        token.check()
+        timeout = token.timeout_for(timeout)
+
+    if command.shell:
+        process = await asyncio.create_subprocess_shell(
+            command.args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=command.cwd,
+            start_new_session=NEW_SESSION
+        )
+    else:
+        process = await asyncio.create_subprocess_exec(
+            *command.args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=command.cwd,
+            start_new_session=NEW_SESSION
+        )
+
+    stdout_chunks = []
+    stderr_chunks = []
+
+    async def communicate():
+        await asyncio.gather(
+            _read_stream(process.stdout, 'stdout', stdout_chunks, on_output),
+            _read_stream(process.stderr, 'stderr', stderr_chunks, on_output)
+        )
+        return await process.wait()
+
+    # Token callbacks fire on the cancelling thread, so hop back onto the loop
+    loop = asyncio.get_running_loop()
+    cancel_requested = asyncio.Event()
+    remove_callback = None
+    if token is not None:
+        remove_callback = token.add_callback(lambda: loop.call_soon_threadsafe(cancel_requested.set))
+
+    communicate_task = asyncio.ensure_future(communicate())
+    cancel_task = asyncio.ensure_future(cancel_requested.wait())
+
+    deadline = time.monotonic() + timeout if timeout is not None else None
+
+    try:
+        while True:
+            done, _ = await asyncio.wait({communicate_task, cancel_task}, timeout=_wait_slice(deadline),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if done or (deadline is not None and time.monotonic() >= deadline):
+                break
+            if token is not None:
+                token.poll()
+    except asyncio.CancelledError:
+        logger.info(f"Cancelled {command!r}, killing pid {process.pid}")
+        await _kill(process)
+        communicate_task.cancel()
+        raise
+    finally:
+        cancel_task.cancel()
+        if remove_callback:
+            remove_callback()
+
+    if communicate_task not in done:
+        await _kill(process)
+        await communicate_task
+        _check_stopped(command, token, timeout, ''.join(stdout_chunks), ''.join(stderr_chunks))
+
+    return subprocess.CompletedProcess(command.args, communicate_task.result(),
+                                       ''.join(stdout_chunks), ''.join(stderr_chunks))
@@ -1,7 +1,29 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
\ No newline at end of file
+db = SQLAlchemy(model_class=Base)
+
+# Native JSON column: jsonb on PostgreSQL, JSON (text with JSON1 functions) on SQLite
+JSONColumn = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), 'postgresql')
+
+
+def insert_ignore(model, values, index_elements):
+    """Insert a row unless one with the same unique key already exists"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        key = {column: values[column] for column in index_elements}
+        if not db.session.query(model).filter_by(**key).first():
+            db.session.add(model(**values))
+            db.session.flush()
+        return
+
+    db.session.execute(insert(model).values(**values).on_conflict_do_nothing(index_elements=index_elements))
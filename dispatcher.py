@@ -0,0 +1,243 @@
+import json
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from database import db
+from models import Agent, AgentTask, NodeExecution, ParameterSet
+import analytics
+import node_types
+
+logger = logging.getLogger(__name__)
+
+# Agents silent for longer than this are marked offline and their tasks requeued
+AGENT_TIMEOUT = 60
+# How many queued tasks a claim looks through for one matching the agent's labels
+CLAIM_SCAN_LIMIT = 100
+
+FINISHED_TASK_STATUSES = ('success', 'error', 'cancelled')
+
+
+class NoCapableAgent(RuntimeError):
+    """Raised when no online agent has the labels a task requires"""
+
+
+def implied_labels(node_type, config):
+    """Capabilities a node type needs on the agent that runs it"""
+    if node_type == 'git_clone':
+        return ['git']
+    if node_type == 'dependency_install':
+        return [config.get('package_manager', 'pip')]
+    return []
+
+
+def register_agent(name, labels):
+    """Register a new agent"""
+    agent = Agent(name=name, labels=json.dumps(sorted(set(labels))), status='online')
+    db.session.add(agent)
+    db.session.commit()
+    logger.info(f"Registered agent {agent.name} ({agent.id}) with labels {agent.get_labels()}")
+    return agent
+
+
+def heartbeat(agent):
+    """Record that an agent is alive"""
+    agent.last_heartbeat = datetime.utcnow()
+    agent.status = 'online'
+
+
+def has_capable_agent(required_labels):
+    """Whether an online agent has every one of the required labels"""
+    requeue_stale_tasks()
+    required = set(required_labels)
+    return any(required <= set(agent.get_labels()) for agent in Agent.query.filter_by(status='online').all())
+
+
+def enqueue(node, parameters=None, labels=None):
+    """Queue a node run for agents; returns the AgentTask.
+
+    The merged configuration is validated up front, and a pending
+    NodeExecution is created so the run shows up in history immediately.
+    Raises NoCapableAgent instead of queueing work no online agent can claim.
+    """
+    config = node.get_config()
+    if parameters:
+        config.update(parameters)
+    node_types.validate_config(node.node_type, config, subject=node.name)
+    if labels is not None and (not isinstance(labels, list) or not all(isinstance(label, str) for label in labels)):
+        raise node_types.ConfigValidationError(['labels must be an array of strings'], node.name)
+
+    required = set(labels or config.get('agent_labels') or [])
+    required.update(implied_labels(node.node_type, config))
+    if not has_capable_agent(required):
+        raise NoCapableAgent(f"No online agent has the labels {sorted(required)} needed by {node.name}")
+
+    execution = NodeExecution(
+        node_id=node.id,
+        status='pending',
+        parameter_set_id=ParameterSet.intern(parameters or {})
+    )
+    db.session.add(execution)
+    db.session.flush()
+
+    task = AgentTask(
+        node_id=node.id,
+        node_execution_id=execution.id,
+        status='queued',
+        node_type=node.node_type,
+        configuration=json.dumps(config),
+        required_labels=json.dumps(sorted(required))
+    )
+    db.session.add(task)
+    db.session.commit()
+
+    logger.info(f"Queued node {node.name} as agent task {task.id}")
+    return task
+
+
+def requeue_stale_tasks():
+    """Mark silent agents offline and put their running tasks back in the queue"""
+    cutoff = datetime.utcnow() - timedelta(seconds=AGENT_TIMEOUT)
+    stale = Agent.query.filter(Agent.status == 'online', Agent.last_heartbeat < cutoff).all()
+
+    for agent in stale:
+        agent.status = 'offline'
+        for task in AgentTask.query.filter_by(agent_id=agent.id, status='running').all():
+            logger.warning(f"Agent {agent.name} went silent, requeueing task {task.id}")
+            task.status = 'queued'
+            task.agent_id = None
+            task.claimed_at = None
+            if task.node_execution.status == 'running':
+                task.node_execution.status = 'pending'
+    if stale:
+        db.session.commit()
+
+
+def claim(agent):
+    """Atomically claim the oldest queued task the agent has the labels for"""
+    heartbeat(agent)
+    requeue_stale_tasks()
+
+    labels = set(agent.get_labels())
+    candidates = AgentTask.query.filter_by(status='queued').order_by(AgentTask.id).limit(CLAIM_SCAN_LIMIT).all()
+
+    for task in candidates:
+        if not set(task.get_required_labels()) <= labels:
+            continue
+
+        if task.node_execution.status == 'cancelled':
+            task.status = 'cancelled'
+            task.finished_at = datetime.utcnow()
+            continue
+
+        # Conditional update so two agents can never claim the same task
+        claimed = db.session.execute(
+            update(AgentTask)
+            .where(AgentTask.id == task.id, AgentTask.status == 'queued')
+            .values(status='running', agent_id=agent.id, claimed_at=datetime.utcnow())
+        ).rowcount
+        if not claimed:
+            continue
+
+        db.session.refresh(task)
+        task.node_execution.status = 'running'
+        db.session.commit()
+
+        logger.info(f"Agent {agent.name} claimed task {task.id}")
+        return task
+
+    db.session.commit()
+    return None
+
+
+def expire_task(task, reason):
+    """Fail a task that no agent claimed in time; returns False if one just did"""
+    now = datetime.utcnow()
+    # Conditional, like claim(), so a task is never both claimed and expired
+    expired = db.session.execute(
+        update(AgentTask)
+        .where(AgentTask.id == task.id, AgentTask.status == 'queued')
+        .values(status='error', finished_at=now, error_message=reason)
+    ).rowcount
+    if not expired:
+        db.session.commit()
+        return False
+
+    db.session.refresh(task)
+    execution = task.node_execution
+    execution.status = 'error'
+    execution.error_message = reason
+    execution.end_time = now
+    analytics.record_execution('node', task.node_id, execution)
+    db.session.commit()
+    logger.warning(f"Agent task {task.id} expired: {reason}")
+    return True
+
+
+def cancel_requested(task):
+    """Whether the task's node execution was cancelled while the agent runs it"""
+    return task.status == 'cancelled' or task.node_execution.status == 'cancelled'
+
+
+def owned_by(task, agent_id):
+    """Whether agent_id is the agent currently running the task.
+
+    A task requeued from a silent agent may still get late reports from it;
+    those must not touch the run of the agent that claimed it since.
+    """
+    return task.status == 'running' and agent_id is not None and task.agent_id == agent_id
+
+
+def append_output(task, output):
+    """Append streamed output from the agent; returns whether it should stop"""
+    if task.status == 'running':
+        if output:
+            task.output = (task.output or '') + output
+        if task.agent:
+            heartbeat(task.agent)
+    db.session.commit()
+    return cancel_requested(task)
+
+
+def complete(task, success, output=None, error=None, cancelled=False):
+    """Record an agent's final result for a task"""
+    execution = task.node_execution
+    if cancelled or cancel_requested(task):
+        status = 'cancelled'
+    else:
+        status = 'success' if success else 'error'
+
+    if status == 'cancelled':
+        # Keep the reason recorded by whoever cancelled (user or workflow deadline)
+        error = execution.error_message or error or 'Execution cancelled'
+
+    now = datetime.utcnow()
+    task.status = status
+    task.finished_at = now
+    if output is not None:
+        task.output = output
+    task.error_message = error
+
+    execution.status = status
+    execution.output = task.output
+    execution.error_message = error
+    execution.end_time = now
+    analytics.record_execution('node', task.node_id, execution)
+
+    db.session.commit()
+    logger.info(f"Agent task {task.id} finished: {status}")
+
+
+def cancel_task(task, reason='Execution cancelled'):
+    """Cancel a task; a running agent picks this up on its next output report"""
+    if task.status in FINISHED_TASK_STATUSES:
+        return
+    if task.status == 'queued':
+        task.status = 'cancelled'
+        task.finished_at = datetime.utcnow()
+    task.node_execution.status = 'cancelled'
+    task.node_execution.error_message = reason
+    task.node_execution.end_time = datetime.utcnow()
+    if task.status == 'cancelled':
+        # Never reached an agent, so no complete() call will record it
+        analytics.record_execution('node', task.node_id, task.node_execution)
+    db.session.commit()
@@ -0,0 +1,262 @@
+import os
+import glob
+import shutil
+import hashlib
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+
+# Copying is I/O bound, so a small pool keeps several files in flight at once.
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def expand_sources(source=None, sources=None):
+    """Expand a source path/glob pattern and an optional list of them into concrete paths"""
+    patterns = []
+    if source:
+        patterns.append(source)
+    if sources:
+        patterns.extend(sources)
+
+    paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                raise ValueError(f"Pattern matched no files: {pattern}")
+            paths.extend(matches)
+        else:
+            paths.append(pattern)
+    return paths
+
+
+def resolve_pairs(config):
+    """Build the list of (source, destination) pairs for a copy/move operation"""
+    pairs = config.get('pairs')
+    if pairs:
+        result = []
+        for pair in pairs:
+            if not pair.get('source') or not pair.get('destination'):
+                raise ValueError("Each pair requires source and destination")
+            result.append((pair['source'], pair['destination']))
+        return result
+
+    destination = config.get('destination')
+    paths = expand_sources(config.get('source'), config.get('sources'))
+    if not paths or not destination:
+        raise ValueError("Source and destination are required")
+
+    # Several sources go *into* the destination directory
+    if len(paths) > 1 or glob.has_magic(config.get('source') or '') or config.get('sources'):
+        os.makedirs(destination, exist_ok=True)
+        return [(path, os.path.join(destination, os.path.basename(path.rstrip(os.sep))))
+                for path in paths]
+    return [(paths[0], destination)]
+
+
+def copy_file(source, destination):
+    """Copy a single file with metadata.
+
+    shutil.copyfile already uses os.sendfile (Linux) / fcopyfile (macOS), so the
+    data is moved in-kernel without passing through Python buffers.
+    """
+    parent = os.path.dirname(destination)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    shutil.copy2(source, destination)
+
+
+def _walk(source_dir):
+    """Yield (root, relative_root, files) for every directory under source_dir.
+
+    Symlinked directories are followed, as shutil.copytree does, except for
+    links back to one of their own ancestors, which would never terminate.
+    """
+    ancestors = {source_dir: frozenset([os.path.realpath(source_dir)])}
+    for root, dirs, files in os.walk(source_dir, followlinks=True):
+        chain = ancestors.pop(root)
+        kept = []
+        for name in dirs:
+            path = os.path.join(root, name)
+            real = os.path.realpath(path)
+            if real not in chain:
+                kept.append(name)
+                ancestors[path] = chain | {real}
+        dirs[:] = kept
+        yield root, os.path.normpath(os.path.relpath(root, source_dir)), files
+
+
+def _run_parallel(func, jobs, workers):
+    """Run func(*job) for every job, in parallel when there are enough of them"""
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            func(*job)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # list() re-raises the first worker exception
+        list(pool.map(lambda job: func(*job), jobs))
+
+
+def copy_tree(source_dir, destination_dir, workers=DEFAULT_WORKERS):
+    """Copy a directory tree, copying files in parallel. Returns the number of files copied"""
+    jobs = []
+    for root, rel_root, files in _walk(source_dir):
+        target_root = os.path.normpath(os.path.join(destination_dir, rel_root))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            jobs.append((os.path.join(root, name), os.path.join(target_root, name)))
+
+    _run_parallel(copy_file, jobs, workers)
+    shutil.copystat(source_dir, destination_dir)
+    return len(jobs)
+
+
+def copy_path(source, destination, workers=DEFAULT_WORKERS):
+    """Copy a file or directory. Returns the number of files copied"""
+    if os.path.isdir(source):
+        return copy_tree(source, destination, workers)
+    if not os.path.exists(source):
+        raise ValueError(f"Path does not exist: {source}")
+    copy_file(source, destination)
+    return 1
+
+
+def delete_path(path):
+    """Delete a file or directory tree. Returns a description of what was removed"""
+    if os.path.isfile(path) or os.path.islink(path):
+        os.remove(path)
+        return f"Deleted file: {path}"
+    elif os.path.isdir(path):
+        shutil.rmtree(path)
+        return f"Deleted directory: {path}"
+    raise ValueError(f"Path does not exist: {path}")
+
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _needs_copy(source, destination, compare):
+    """Decide whether a file differs between source and destination"""
+    try:
+        dst_stat = os.stat(destination)
+    except FileNotFoundError:
+        return True
+    src_stat = os.stat(source)
+
+    if src_stat.st_size != dst_stat.st_size:
+        return True
+    if compare == 'hash':
+        return file_digest(source) != file_digest(destination)
+    # copy2 preserves mtime to the nanosecond, so an unchanged file has an identical mtime
+    return src_stat.st_mtime_ns != dst_stat.st_mtime_ns
+
+
+def _remove_conflicting(path, kind, delete_extraneous):
+    """Clear a destination entry standing where the source has a {kind}; returns 1"""
+    if not delete_extraneous:
+        raise ValueError(f"Cannot sync {kind} over {path}; remove it or enable delete_extraneous")
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+    return 1
+
+
+def sync_tree(source_dir, destination_dir, compare='mtime', delete_extraneous=False,
+              workers=DEFAULT_WORKERS):
+    """Make destination_dir mirror source_dir, copying only files that changed.
+
+    A destination entry of the wrong kind (a directory where the source has
+    a file, or the reverse) is replaced when delete_extraneous is set and
+    raises ValueError otherwise.
+    """
+    if not os.path.isdir(source_dir):
+        raise ValueError(f"Source directory does not exist: {source_dir}")
+    if compare not in ('mtime', 'hash'):
+        raise ValueError(f"Unsupported sync comparison: {compare}")
+
+    os.makedirs(destination_dir, exist_ok=True)
+
+    seen = set()
+    seen_dirs = set()
+    jobs = []
+    unchanged = 0
+    deleted = 0
+    for root, rel_root, files in _walk(source_dir):
+        seen_dirs.add(rel_root)
+        target_root = os.path.join(destination_dir, rel_root)
+        if rel_root != os.curdir and (os.path.islink(target_root) or
+                                      (os.path.lexists(target_root) and not os.path.isdir(target_root))):
+            deleted += _remove_conflicting(target_root, 'a directory', delete_extraneous)
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            rel_path = os.path.normpath(os.path.join(rel_root, name))
+            seen.add(rel_path)
+            dst_path = os.path.join(destination_dir, rel_path)
+            if os.path.isdir(dst_path):
+                # copy2 would put the file inside the directory instead of at dst_path
+                deleted += _remove_conflicting(dst_path, 'a file', delete_extraneous)
+            if _needs_copy(os.path.join(root, name), dst_path, compare):
+                jobs.append((os.path.join(root, name), dst_path))
+            else:
+                unchanged += 1
+
+    _run_parallel(copy_file, jobs, workers)
+
+    if delete_extraneous:
+        # Bottom-up and without following links, so nothing outside the destination is touched
+        for root, dirs, files in os.walk(destination_dir, topdown=False):
+            rel_root = os.path.normpath(os.path.relpath(root, destination_dir))
+            for name in files:
+                if os.path.normpath(os.path.join(rel_root, name)) not in seen:
+                    os.remove(os.path.join(root, name))
+                    deleted += 1
+            for name in dirs:
+                if os.path.normpath(os.path.join(rel_root, name)) not in seen_dirs:
+                    path = os.path.join(root, name)
+                    if os.path.islink(path):
+                        os.remove(path)
+                    else:
+                        os.rmdir(path)
+
+    return {'copied': len(jobs), 'unchanged': unchanged, 'deleted': deleted}
+
+
+def _create_temp(directory, name):
+    """Create a hidden temporary file next to the destination; returns (fd, path).
+
+    Unlike mkstemp (always 0600) the file is created with mode 0666, so the
+    kernel applies the process umask just as for a plain open().
+    """
+    while True:
+        path = os.path.join(directory, f".{name}.{secrets.token_hex(8)}.tmp")
+        try:
+            return os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666), path
+        except FileExistsError:
+            continue
+
+
+def atomic_write(destination, content):
+    """Write content to destination so readers never observe a partial file"""
+    directory = os.path.dirname(destination) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = _create_temp(directory, os.path.basename(destination))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(destination):
+            shutil.copymode(destination, tmp_path)
+        os.replace(tmp_path, destination)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,76 @@
+import os
+import glob
+import json
+import hashlib
+
+
+def _digest(payload):
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def output_digest(output):
+    """Digest of a step's output, chained into the next step's fingerprint"""
+    return _digest(output or '')
+
+
+def _path_list(value, key):
+    """A step's input_files/output_files value as a list, accepting a single path"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"{key} must be a path or a list of paths")
+    return value
+
+
+def _file_signatures(patterns):
+    """(path, size, mtime_ns) for every file matched by the declared input paths/globs"""
+    signatures = []
+    for pattern in patterns:
+        paths = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for path in paths:
+            if os.path.isdir(path):
+                for root, dirs, files in os.walk(path):
+                    dirs.sort()
+                    for name in sorted(files):
+                        signatures.append(_stat_signature(os.path.join(root, name)))
+            else:
+                signatures.append(_stat_signature(path))
+    return signatures
+
+
+def _stat_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return [path, None, None]
+    return [path, stat.st_size, stat.st_mtime_ns]
+
+
+def step_fingerprint(node, config, upstream):
+    """Fingerprint of everything a step's result depends on.
+
+    Covers the node type, the merged configuration, the upstream chain (the
+    previous step's fingerprint and output digest) and the size/mtime of any
+    files listed in the step's input_files parameter.
+    """
+    payload = {
+        'node_id': node.id,
+        'node_type': node.node_type,
+        'config': config,
+        'upstream': upstream,
+        'input_files': _file_signatures(_path_list(config.get('input_files'), 'input_files'))
+    }
+    return _digest(json.dumps(payload, sort_keys=True, default=str))
+
+
+def chain(fingerprint, output):
+    """Upstream value handed to the next step"""
+    return _digest(fingerprint + output_digest(output))
+
+
+def outputs_present(config):
+    """Whether every path in the step's output_files parameter still exists"""
+    return all(glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else os.path.exists(pattern)
+               for pattern in _path_list(config.get('output_files'), 'output_files'))
@@ -0,0 +1,80 @@
+import json
+import logging
+from sqlalchemy import inspect, text
+from database import db
+from models import ParameterSet
+
+logger = logging.getLogger(__name__)
+
+# Columns that used to hold JSON strings in Text columns
+JSON_COLUMNS = (
+    ('node', 'configuration'),
+    ('workflow_step', 'parameters'),
+)
+
+
+def upgrade():
+    """Bring a database created by an older version up to the current schema.
+
+    create_all() only adds missing tables, so columns added to existing tables
+    and changed column types are handled here. Every step is idempotent.
+    """
+    inspector = inspect(db.engine)
+    _add_column(inspector, 'node_execution', 'parameter_set_id', 'INTEGER REFERENCES parameter_set (id)')
+    # Buckets written before duration_min existed keep it NULL (read as 0)
+    _add_column(inspector, 'execution_stats', 'duration_min', 'FLOAT')
+
+    _migrate_execution_parameters()
+
+    if db.engine.dialect.name == 'postgresql':
+        _convert_json_columns(inspector)
+
+
+def _add_column(inspector, table, column, definition):
+    """Add a column to an existing table unless it is already there"""
+    if column in {c['name'] for c in inspector.get_columns(table)}:
+        return
+    logger.info(f"Adding {table}.{column}")
+    db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {definition}'))
+    db.session.commit()
+
+
+def _migrate_execution_parameters(batch_size=1000):
+    """Move per-execution parameter strings into shared parameter sets"""
+    migrated = 0
+    while True:
+        rows = db.session.execute(text(
+            'SELECT id, parameters FROM node_execution '
+            'WHERE parameters IS NOT NULL AND parameter_set_id IS NULL LIMIT :limit'
+        ), {'limit': batch_size}).all()
+        if not rows:
+            break
+
+        for execution_id, parameters in rows:
+            try:
+                data = json.loads(parameters) or {}
+            except ValueError:
+                logger.warning(f"Dropping unreadable parameters of node execution {execution_id}")
+                data = {}
+            db.session.execute(text(
+                'UPDATE node_execution SET parameter_set_id = :set_id, parameters = NULL WHERE id = :id'
+            ), {'set_id': ParameterSet.intern(data), 'id': execution_id})
+
+        db.session.commit()
+        migrated += len(rows)
+
+    if migrated:
+        logger.info(f"Moved parameters of {migrated} node executions into parameter sets")
+
+
+def _convert_json_columns(inspector):
+    """Switch legacy text columns to jsonb on PostgreSQL"""
+    for table, column in JSON_COLUMNS:
+        current = next(c for c in inspector.get_columns(table) if c['name'] == column)
+        if current['type'].__class__.__name__.upper() == 'JSONB':
+            continue
+        logger.info(f"Converting {table}.{column} to jsonb")
+        db.session.execute(text(
+            f'ALTER TABLE {table} ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb'
+        ))
+    db.session.commit()
@@ -1,6 +1,34 @@
-from database import db
+from database import db, JSONColumn, insert_ignore
 from datetime import datetime
 import json
+import hashlib
+
+
+class ParameterSet(db.Model):
+    """Model for deduplicated execution parameters.
+    
+    Executions reference a parameter set by id instead of storing their own
+    copy, so repeated runs with the same parameters share one row.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    digest = db.Column(db.String(64), nullable=False, unique=True)  # SHA-256 of the canonical JSON
+    data = db.Column(JSONColumn, nullable=False)
+    
+    @staticmethod
+    def digest_for(data):
+        """Content hash identifying a parameter dictionary"""
+        canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def intern(cls, data):
+        """Get the id of the parameter set holding data, creating it if needed"""
+        digest = cls.digest_for(data)
+        parameter_set_id = db.session.query(cls.id).filter_by(digest=digest).scalar()
+        if parameter_set_id is None:
+            insert_ignore(cls, {'digest': digest, 'data': data}, ['digest'])
+            parameter_set_id = db.session.query(cls.id).filter_by(digest=digest).scalar()
+        return parameter_set_id
 
 
 class Node(db.Model):
@@ -9,7 +37,7 @@ class Node(db.Model):
     name = db.Column(db.String(100), nullable=False)
     node_type = db.Column(db.String(50), nullable=False)  # git_clone, env_setup, dependency_install, etc.
     description = db.Column(db.Text)
-    configuration = db.Column(db.Text)  # JSON string for node parameters
+    configuration = db.Column(JSONColumn)  # Node parameters
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -24,23 +52,19 @@ class Node(db.Model):
             'name': self.name,
             'node_type': self.node_type,
             'description': self.description,
-            'configuration': json.loads(self.configuration) if self.configuration else {},
+            'configuration': self.configuration or {},
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
     
     def get_config(self):
-        """Get parsed configuration as dictionary"""
-        if self.configuration:
-            try:
-                return json.loads(self.configuration)
-            except json.JSONDecodeError:
-                return {}
-        return {}
+        """Get configuration as a dictionary the caller may modify"""
+        # The column is parsed once when the row is loaded; hand out a copy
+        return dict(self.configuration or {})
     
     def set_config(self, config_dict):
         """Set configuration from dictionary"""
-        self.configuration = json.dumps(config_dict)
+        self.configuration = dict(config_dict)
 
 
 class Workflow(db.Model):
@@ -54,6 +78,7 @@ class Workflow(db.Model):
     # Relationships
     steps = db.relationship('WorkflowStep', backref='workflow', lazy=True, order_by='WorkflowStep.order', cascade='all, delete-orphan')
     executions = db.relationship('WorkflowExecution', backref='workflow', lazy=True, cascade='all, delete-orphan')
+    schedules = db.relationship('WorkflowSchedule', backref='workflow', lazy=True, cascade='all, delete-orphan')
     
     def to_dict(self):
         """Convert workflow to dictionary for JSON response"""
@@ -73,7 +98,11 @@ class WorkflowStep(db.Model):
     workflow_id = db.Column(db.Integer, db.ForeignKey('workflow.id'), nullable=False)
     node_id = db.Column(db.Integer, db.ForeignKey('node.id'), nullable=False)
     order = db.Column(db.Integer, nullable=False)
-    parameters = db.Column(db.Text)  # JSON string for step-specific parameters
+    parameters = db.Column(JSONColumn)  # Step-specific parameters
+    
+    def get_parameters(self):
+        """Get step parameters as a dictionary the caller may modify"""
+        return dict(self.parameters or {})
     
     def to_dict(self):
         """Convert workflow step to dictionary"""
@@ -84,7 +113,7 @@ class WorkflowStep(db.Model):
             'node_name': self.node.name if self.node else None,
             'node_type': self.node.node_type if self.node else None,
             'order': self.order,
-            'parameters': json.loads(self.parameters) if self.parameters else {}
+            'parameters': self.parameters or {}
         }
 
 
@@ -92,12 +121,22 @@ class NodeExecution(db.Model):
     """Model for tracking node execution history"""
     id = db.Column(db.Integer, primary_key=True)
     node_id = db.Column(db.Integer, db.ForeignKey('node.id'), nullable=False)
-    status = db.Column(db.String(20), nullable=False)  # pending, running, success, error
+    status = db.Column(db.String(20), nullable=False)  # pending, running, success, error, cancelled
     start_time = db.Column(db.DateTime, default=datetime.utcnow)
     end_time = db.Column(db.DateTime)
     output = db.Column(db.Text)  # Execution output/logs
     error_message = db.Column(db.Text)
-    parameters = db.Column(db.Text)  # JSON string of parameters used
+    parameter_set_id = db.Column(db.Integer, db.ForeignKey('parameter_set.id'))  # Parameters used
+    parameters = db.Column(db.Text)  # Legacy JSON string; migrated to parameter_set_id by init-db
+    
+    # Relationships
+    parameter_set = db.relationship('ParameterSet')
+    
+    def get_parameters(self):
+        """Get the parameters used for this execution"""
+        if self.parameter_set is not None:
+            return self.parameter_set.data
+        return json.loads(self.parameters) if self.parameters else {}
     
     def to_dict(self):
         """Convert execution to dictionary for JSON response"""
@@ -110,7 +149,7 @@ class NodeExecution(db.Model):
             'end_time': self.end_time.isoformat() if self.end_time else None,
             'output': self.output,
             'error_message': self.error_message,
-            'parameters': json.loads(self.parameters) if self.parameters else {}
+            'parameters': self.get_parameters()
         }
 
 
@@ -118,13 +157,16 @@ class WorkflowExecution(db.Model):
     """Model for tracking workflow execution history"""
     id = db.Column(db.Integer, primary_key=True)
     workflow_id = db.Column(db.Integer, db.ForeignKey('workflow.id'), nullable=False)
-    status = db.Column(db.String(20), nullable=False)  # pending, running, success, error
+    status = db.Column(db.String(20), nullable=False)  # pending, running, success, error, cancelled
     start_time = db.Column(db.DateTime, default=datetime.utcnow)
     end_time = db.Column(db.DateTime)
     current_step = db.Column(db.Integer, default=0)
     output = db.Column(db.Text)
     error_message = db.Column(db.Text)
     
+    # Relationships
+    step_runs = db.relationship('StepRun', backref='workflow_execution', lazy=True, order_by='StepRun.order', cascade='all, delete-orphan')
+    
     def to_dict(self):
         """Convert workflow execution to dictionary"""
         return {
@@ -139,3 +181,198 @@ class WorkflowExecution(db.Model):
             'output': self.output,
             'error_message': self.error_message
         }
+
+
+class WorkflowSchedule(db.Model):
+    """Model for a recurring run of a workflow.
+    
+    Either cron (five fields, UTC) or interval_seconds sets the cadence.
+    next_run_at is the nominal time of the next run; each run starts up to
+    jitter seconds after it (see schedules.py and scheduler.py).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    workflow_id = db.Column(db.Integer, db.ForeignKey('workflow.id'), nullable=False, index=True)
+    name = db.Column(db.String(100))
+    cron = db.Column(db.String(100))
+    interval_seconds = db.Column(db.Integer)
+    parameters = db.Column(JSONColumn)  # Run parameters, as for POST /execute
+    timeout = db.Column(db.Float)  # Workflow-level deadline in seconds
+    jitter = db.Column(db.Float, default=0)  # Maximum random start delay in seconds
+    enabled = db.Column(db.Boolean, nullable=False, default=True)
+    next_run_at = db.Column(db.DateTime, index=True)
+    last_run_at = db.Column(db.DateTime)
+    last_status = db.Column(db.String(20))  # started, skipped, success, error, cancelled
+    last_execution_id = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert schedule to dictionary for JSON response"""
+        return {
+            'id': self.id,
+            'workflow_id': self.workflow_id,
+            'workflow_name': self.workflow.name if self.workflow else None,
+            'name': self.name,
+            'cron': self.cron,
+            'interval_seconds': self.interval_seconds,
+            'parameters': self.parameters or {},
+            'timeout': self.timeout,
+            'jitter': self.jitter or 0,
+            'enabled': self.enabled,
+            'next_run_at': self.next_run_at.isoformat() if self.next_run_at else None,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'last_status': self.last_status,
+            'last_execution_id': self.last_execution_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class StepRun(db.Model):
+    """Model for the per-step record of a workflow execution.
+    
+    fingerprint covers the step's inputs (see fingerprints.py); incremental
+    executions reuse the node execution of an earlier run with the same one.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    workflow_execution_id = db.Column(db.Integer, db.ForeignKey('workflow_execution.id'), nullable=False)
+    node_execution_id = db.Column(db.Integer, db.ForeignKey('node_execution.id', ondelete='SET NULL'))
+    node_id = db.Column(db.Integer, nullable=False)
+    order = db.Column(db.Integer, nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False)  # success, error, cancelled, reused
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    node_execution = db.relationship('NodeExecution', backref='step_runs')
+    
+    def to_dict(self):
+        """Convert step run to dictionary"""
+        return {
+            'id': self.id,
+            'order': self.order,
+            'node_id': self.node_id,
+            'node_execution_id': self.node_execution_id,
+            'fingerprint': self.fingerprint,
+            'status': self.status
+        }
+
+
+class ExecutionStats(db.Model):
+    """Hourly pre-aggregated execution statistics for a node or workflow.
+    
+    Rows are incremented in place when an execution finishes (see analytics.py),
+    so dashboards read O(buckets) rows instead of scanning execution history.
+    Duration histogram bins follow analytics.DURATION_BOUNDS.
+    """
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'subject_id', 'bucket_start', name='uq_execution_stats_bucket'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(20), nullable=False)  # node, workflow
+    subject_id = db.Column(db.Integer, nullable=False)  # node id or workflow id
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    success_count = db.Column(db.Integer, nullable=False, default=0)
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    cancelled_count = db.Column(db.Integer, nullable=False, default=0)
+    duration_sum = db.Column(db.Float, nullable=False, default=0.0)
+    duration_max = db.Column(db.Float, nullable=False, default=0.0)
+    duration_min = db.Column(db.Float)  # NULL until the first execution is recorded
+    # Duration histogram: counts of executions taking <= 1s, 5s, 15s, 30s, 1m, 2m, 5m, 10m, 30m, longer
+    hist_0 = db.Column(db.Integer, nullable=False, default=0)
+    hist_1 = db.Column(db.Integer, nullable=False, default=0)
+    hist_2 = db.Column(db.Integer, nullable=False, default=0)
+    hist_3 = db.Column(db.Integer, nullable=False, default=0)
+    hist_4 = db.Column(db.Integer, nullable=False, default=0)
+    hist_5 = db.Column(db.Integer, nullable=False, default=0)
+    hist_6 = db.Column(db.Integer, nullable=False, default=0)
+    hist_7 = db.Column(db.Integer, nullable=False, default=0)
+    hist_8 = db.Column(db.Integer, nullable=False, default=0)
+    hist_9 = db.Column(db.Integer, nullable=False, default=0)
+    
+    @property
+    def histogram(self):
+        """Duration histogram bin counts as a list"""
+        return [getattr(self, f'hist_{i}') or 0 for i in range(10)]
+    
+    def to_dict(self):
+        """Convert stats bucket to dictionary for JSON response"""
+        return {
+            'bucket_start': self.bucket_start.isoformat(),
+            'success': self.success_count,
+            'error': self.error_count,
+            'cancelled': self.cancelled_count,
+            'duration_sum': self.duration_sum,
+            'duration_max': self.duration_max,
+            'duration_min': self.duration_min,
+            'histogram': self.histogram
+        }
+
+
+class Agent(db.Model):
+    """Model for remote executor agents that pull node work over HTTP"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    labels = db.Column(db.Text)  # JSON list of capability labels, e.g. ["git", "npm"]
+    status = db.Column(db.String(20), nullable=False, default='online')  # online, offline
+    last_heartbeat = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def get_labels(self):
+        """Get capability labels as a list"""
+        return json.loads(self.labels) if self.labels else []
+    
+    def to_dict(self):
+        """Convert agent to dictionary for JSON response"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'labels': self.get_labels(),
+            'status': self.status,
+            'last_heartbeat': self.last_heartbeat.isoformat() if self.last_heartbeat else None,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class AgentTask(db.Model):
+    """Model for node executions queued for remote agents"""
+    id = db.Column(db.Integer, primary_key=True)
+    node_id = db.Column(db.Integer, db.ForeignKey('node.id'), nullable=False)
+    node_execution_id = db.Column(db.Integer, db.ForeignKey('node_execution.id'), nullable=False)
+    agent_id = db.Column(db.Integer, db.ForeignKey('agent.id'))
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, success, error, cancelled
+    node_type = db.Column(db.String(50), nullable=False)
+    configuration = db.Column(db.Text)  # JSON string of the merged configuration to run
+    required_labels = db.Column(db.Text)  # JSON list of labels the agent must have
+    output = db.Column(db.Text)
+    error_message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    # Relationships
+    node = db.relationship('Node', backref=db.backref('agent_tasks', cascade='all, delete-orphan'))
+    node_execution = db.relationship('NodeExecution', backref=db.backref('agent_tasks', cascade='all, delete-orphan'))
+    agent = db.relationship('Agent', backref='tasks')
+    
+    def get_required_labels(self):
+        """Get required labels as a list"""
+        return json.loads(self.required_labels) if self.required_labels else []
+    
+    def to_dict(self):
+        """Convert agent task to dictionary for JSON response"""
+        return {
+            'id': self.id,
+            'node_id': self.node_id,
+            'node_execution_id': self.node_execution_id,
+            'agent_id': self.agent_id,
+            'status': self.status,
+            'node_type': self.node_type,
+            'configuration': json.loads(self.configuration) if self.configuration else {},
+            'required_labels': self.get_required_labels(),
+            'output': self.output,
+            'error_message': self.error_message,
+            'created_at': self.created_at.isoformat(),
+            'claimed_at': self.claimed_at.isoformat() if self.claimed_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -1,70 +1,158 @@
-import subprocess
 import os
+import types
+import inspect
 import logging
-import json
 from datetime import datetime
-from models import NodeExecution
+from models import NodeExecution, ParameterSet
 from database import db
+from command_runner import Command, run_command
+import cancellation
+import analytics
+import node_types
+from node_types import register_node_type
+from cancellation import CancellationToken, ExecutionCancelled
 
 logger = logging.getLogger(__name__)
 
 
+def _check_file_operation(config):
+    """Cross-field requirements of each file operation"""
+    operation = config.get('operation')
+    has_source = bool(config.get('source') or config.get('sources'))
+    
+    if operation == 'create' and (not config.get('destination') or config.get('content') is None):
+        return ["Destination and content are required for create operation"]
+    if operation in ('copy', 'move') and not config.get('pairs') and not (has_source and config.get('destination')):
+        return [f"Source and destination are required for {operation} operation"]
+    if operation == 'delete' and not has_source:
+        return ["Source is required for delete operation"]
+    if operation == 'sync' and not (config.get('source') and config.get('destination')):
+        return ["Source and destination are required for sync operation"]
+    return []
+
+
 class NodeExecutor:
     """Class responsible for executing different types of nodes"""
     
     def __init__(self):
+        # Handlers come from the node type registry; bind them to this executor
         self.node_types = {
-            'git_clone': self._execute_git_clone,
-            'env_setup': self._execute_env_setup,
-            'dependency_install': self._execute_dependency_install,
-            'shell_command': self._execute_shell_command,
-            'file_operation': self._execute_file_operation
+            key: types.MethodType(node_type.handler, self)
+            for key, node_type in node_types.get_registry().items()
         }
     
-    def execute_node(self, node, parameters=None):
-        """Execute a node with given parameters"""
-        # Create execution record
+    def execute_node(self, node, parameters=None, token=None):
+        """Execute a node with given parameters.
+        
+        token is an optional CancellationToken (e.g. the running workflow's);
+        the execution gets a child of it so it can also be cancelled by id.
+        """
+        execution, token = self._start_execution(node, parameters, token)
+        
+        try:
+            handler, config = self._prepare(node, parameters)
+            result = self._drive(handler, config, token)
+            return self._finish_success(execution, node, result)
+                
+        except Exception as e:
+            return self._finish_error(execution, node, e)
+        
+        finally:
+            cancellation.unregister('node', execution.id)
+            db.session.commit()
+    
+    def run(self, node, parameters=None, token=None):
+        """Blocking entry point shared by all executor backends"""
+        return self.execute_node(node, parameters, token)
+    
+    def _start_execution(self, node, parameters, token=None):
+        """Create the execution record for a node run and register its cancellation token"""
         execution = NodeExecution(
             node_id=node.id,
             status='running',
-            parameters=json.dumps(parameters or {})
+            parameter_set_id=ParameterSet.intern(parameters or {})
         )
         db.session.add(execution)
         db.session.commit()
         
-        try:
-            # Merge node configuration with execution parameters
-            config = node.get_config()
-            if parameters:
-                config.update(parameters)
-            
-            # Execute based on node type
-            if node.node_type in self.node_types:
-                result = self.node_types[node.node_type](config)
-                
-                # Update execution record with success
-                execution.status = 'success'
-                execution.output = result.get('output', '')
-                execution.end_time = datetime.utcnow()
-                
-                logger.info(f"Node {node.name} executed successfully")
-                return {'success': True, 'output': result.get('output', '')}
-                
-            else:
-                raise ValueError(f"Unsupported node type: {node.node_type}")
-                
-        except Exception as e:
-            # Update execution record with error
-            execution.status = 'error'
-            execution.error_message = str(e)
-            execution.end_time = datetime.utcnow()
-            
-            logger.error(f"Node {node.name} execution failed: {str(e)}")
-            return {'success': False, 'error': str(e)}
+        token = token.child() if token else CancellationToken()
+        token.set_poll(lambda: self._cancelled_elsewhere(execution))
+        cancellation.register('node', execution.id, token)
+        return execution, token
+    
+    def _merge_config(self, node, parameters):
+        """Merge node configuration with execution parameters"""
+        config = node.get_config()
+        if parameters:
+            config.update(parameters)
+        return config
+    
+    def _get_handler(self, node):
+        """Look up the handler for a node's type"""
+        if node.node_type not in self.node_types:
+            raise ValueError(f"Unsupported node type: {node.node_type}")
+        return self.node_types[node.node_type]
+    
+    def _prepare(self, node, parameters):
+        """Resolve the handler and the validated, merged configuration for a run"""
+        handler = self._get_handler(node)
+        config = self._merge_config(node, parameters)
+        node_types.validate_config(node.node_type, config)
+        return handler, config
+    
+    def _cancelled_elsewhere(self, execution):
+        """Check whether the cancel endpoint marked this execution while it ran"""
+        status = db.session.query(NodeExecution.status).filter_by(id=execution.id).scalar()
+        return status == 'cancelled'
+    
+    def _finish_success(self, execution, node, result):
+        """Update execution record with success"""
+        if self._cancelled_elsewhere(execution):
+            return self._finish_error(execution, node, ExecutionCancelled())
         
-        finally:
-            db.session.commit()
+        execution.status = 'success'
+        execution.output = result.get('output', '')
+        execution.end_time = datetime.utcnow()
+        analytics.record_execution('node', node.id, execution)
+        
+        logger.info(f"Node {node.name} executed successfully")
+        return {'success': True, 'output': result.get('output', ''), 'execution_id': execution.id}
     
+    def _finish_error(self, execution, node, error):
+        """Update execution record with error"""
+        cancelled = isinstance(error, ExecutionCancelled)
+        execution.status = 'cancelled' if cancelled else 'error'
+        execution.error_message = str(error)
+        execution.end_time = datetime.utcnow()
+        analytics.record_execution('node', node.id, execution)
+        
+        logger.error(f"Node {node.name} execution failed: {str(error)}")
+        return {'success': False, 'error': str(error), 'cancelled': cancelled, 'execution_id': execution.id}
+    
+    def _drive(self, handler, config, token):
+        """Run a handler, executing each Command it yields with a blocking subprocess"""
+        token.check()
+        if not inspect.isgeneratorfunction(handler):
+            return handler(config)
+        
+        steps = handler(config)
+        try:
+            command = next(steps)
+            while True:
+                command = steps.send(run_command(command, token))
+        except StopIteration as stop:
+            return stop.value
+    
+    @register_node_type(
+        'git_clone',
+        name='Git Clone',
+        description='Clone a Git repository',
+        parameters={
+            'url': {'type': 'string', 'required': True, 'description': 'Git repository URL'},
+            'branch': {'type': 'string', 'required': False, 'default': 'main', 'description': 'Branch to clone'},
+            'target_dir': {'type': 'string', 'required': False, 'default': './cloned_repo', 'description': 'Target directory'}
+        }
+    )
     def _execute_git_clone(self, config):
         """Execute git clone operation"""
         url = config.get('url')
@@ -78,7 +166,7 @@ class NodeExecutor:
         cmd = ['git', 'clone', '--branch', branch, url, target_dir]
         
         # Execute command
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        result = yield Command(cmd, timeout=300)
         
         if result.returncode != 0:
             raise RuntimeError(f"Git clone failed: {result.stderr}")
@@ -87,6 +175,15 @@ class NodeExecutor:
             'output': f"Successfully cloned {url} (branch: {branch}) to {target_dir}\n{result.stdout}"
         }
     
+    @register_node_type(
+        'env_setup',
+        name='Environment Setup',
+        description='Set environment variables',
+        parameters={
+            'environment_variables': {'type': 'object', 'required': True, 'description': 'Key-value pairs of environment variables'}
+        },
+        cacheable=False
+    )
     def _execute_env_setup(self, config):
         """Execute environment setup"""
         env_vars = config.get('environment_variables', {})
@@ -100,6 +197,16 @@ class NodeExecutor:
             'output': '\n'.join(output_lines) if output_lines else 'No environment variables to set'
         }
     
+    @register_node_type(
+        'dependency_install',
+        name='Dependency Installation',
+        description='Install dependencies using package managers',
+        parameters={
+            'package_manager': {'type': 'string', 'required': False, 'default': 'pip', 'enum': ['pip', 'npm'], 'description': 'Package manager (pip, npm)'},
+            'packages': {'type': 'array', 'required': False, 'description': 'List of packages to install'},
+            'requirements_file': {'type': 'string', 'required': False, 'description': 'Path to requirements file'}
+        }
+    )
     def _execute_dependency_install(self, config):
         """Execute dependency installation"""
         package_manager = config.get('package_manager', 'pip')
@@ -117,7 +224,7 @@ class NodeExecutor:
             else:
                 raise ValueError(f"Unsupported package manager: {package_manager}")
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+            result = yield Command(cmd, timeout=600)
             if result.returncode != 0:
                 raise RuntimeError(f"Dependency installation failed: {result.stderr}")
             
@@ -134,7 +241,7 @@ class NodeExecutor:
                 else:
                     raise ValueError(f"Unsupported package manager: {package_manager}")
                 
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+                result = yield Command(cmd, timeout=300)
                 if result.returncode != 0:
                     raise RuntimeError(f"Failed to install {package}: {result.stderr}")
                 
@@ -144,6 +251,16 @@ class NodeExecutor:
             'output': '\n'.join(output_lines) if output_lines else 'No packages to install'
         }
     
+    @register_node_type(
+        'shell_command',
+        name='Shell Command',
+        description='Execute shell commands',
+        parameters={
+            'command': {'type': 'string', 'required': True, 'description': 'Command to execute'},
+            'working_dir': {'type': 'string', 'required': False, 'default': '.', 'description': 'Working directory'},
+            'timeout': {'type': 'number', 'required': False, 'default': 300, 'description': 'Timeout in seconds'}
+        }
+    )
     def _execute_shell_command(self, config):
         """Execute shell command"""
         command = config.get('command')
@@ -154,14 +271,7 @@ class NodeExecutor:
             raise ValueError("Command is required")
         
         # Execute command
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            cwd=working_dir,
-            timeout=timeout
-        )
+        result = yield Command(command, timeout=timeout, shell=True, cwd=working_dir)
         
         if result.returncode != 0:
             raise RuntimeError(f"Command failed with exit code {result.returncode}: {result.stderr}")
@@ -170,54 +280,90 @@ class NodeExecutor:
             'output': f"Command executed successfully\nSTDOUT:\n{result.stdout}\nSTDERR:\n{result.stderr}"
         }
     
+    @register_node_type(
+        'file_operation',
+        name='File Operation',
+        description='Perform file operations',
+        parameters={
+            'operation': {'type': 'string', 'required': True, 'enum': ['copy', 'move', 'delete', 'create', 'sync'], 'description': 'Operation type (copy, move, delete, create, sync)'},
+            'source': {'type': 'string', 'required': False, 'description': 'Source path or glob pattern'},
+            'sources': {'type': 'array', 'required': False, 'description': 'List of source paths or glob patterns'},
+            'destination': {'type': 'string', 'required': False, 'description': 'Destination path'},
+            'pairs': {'type': 'array', 'required': False, 'description': 'List of {source, destination} pairs for bulk copy/move'},
+            'content': {'type': 'string', 'required': False, 'description': 'File content for create operation'},
+            'compare': {'type': 'string', 'required': False, 'default': 'mtime', 'enum': ['mtime', 'hash'], 'description': 'Change detection for sync (mtime, hash)'},
+            'delete_extraneous': {'type': 'boolean', 'required': False, 'default': False, 'description': 'Remove destination files missing from source during sync'},
+            'workers': {'type': 'integer', 'required': False, 'description': 'Parallel copy workers for directory trees'}
+        },
+        check=_check_file_operation
+    )
     def _execute_file_operation(self, config):
         """Execute file operations"""
-        operation = config.get('operation')  # copy, move, delete, create
+        import shutil
+        import file_operations
+        
+        operation = config.get('operation')  # copy, move, delete, create, sync
         source = config.get('source')
         destination = config.get('destination')
         content = config.get('content')
+        workers = int(config.get('workers', file_operations.DEFAULT_WORKERS))
         
         if operation == 'create':
             if not destination or content is None:
                 raise ValueError("Destination and content are required for create operation")
             
-            os.makedirs(os.path.dirname(destination), exist_ok=True)
-            with open(destination, 'w') as f:
-                f.write(content)
+            file_operations.atomic_write(destination, content)
             
             return {'output': f"Created file: {destination}"}
         
         elif operation == 'copy':
-            if not source or not destination:
+            if not config.get('pairs') and (not (source or config.get('sources')) or not destination):
                 raise ValueError("Source and destination are required for copy operation")
             
-            import shutil
-            shutil.copy2(source, destination)
+            output_lines = []
+            total_files = 0
+            for src, dst in file_operations.resolve_pairs(config):
+                total_files += file_operations.copy_path(src, dst, workers)
+                output_lines.append(f"Copied {src} to {dst}")
             
-            return {'output': f"Copied {source} to {destination}"}
+            if total_files > 1:
+                output_lines.append(f"{total_files} files copied")
+            return {'output': '\n'.join(output_lines)}
         
         elif operation == 'move':
-            if not source or not destination:
+            if not config.get('pairs') and (not (source or config.get('sources')) or not destination):
                 raise ValueError("Source and destination are required for move operation")
             
-            import shutil
-            shutil.move(source, destination)
+            output_lines = []
+            for src, dst in file_operations.resolve_pairs(config):
+                shutil.move(src, dst)
+                output_lines.append(f"Moved {src} to {dst}")
             
-            return {'output': f"Moved {source} to {destination}"}
+            return {'output': '\n'.join(output_lines)}
         
         elif operation == 'delete':
-            if not source:
+            if not source and not config.get('sources'):
                 raise ValueError("Source is required for delete operation")
             
-            if os.path.isfile(source):
-                os.remove(source)
-                return {'output': f"Deleted file: {source}"}
-            elif os.path.isdir(source):
-                import shutil
-                shutil.rmtree(source)
-                return {'output': f"Deleted directory: {source}"}
-            else:
-                raise ValueError(f"Path does not exist: {source}")
+            paths = file_operations.expand_sources(source, config.get('sources'))
+            return {'output': '\n'.join(file_operations.delete_path(path) for path in paths)}
+        
+        elif operation == 'sync':
+            if not source or not destination:
+                raise ValueError("Source and destination are required for sync operation")
+            
+            stats = file_operations.sync_tree(
+                source,
+                destination,
+                compare=config.get('compare', 'mtime'),
+                delete_extraneous=config.get('delete_extraneous', False),
+                workers=workers
+            )
+            
+            return {
+                'output': f"Synced {source} to {destination}: {stats['copied']} copied, "
+                          f"{stats['unchanged']} unchanged, {stats['deleted']} deleted"
+            }
         
         else:
             raise ValueError(f"Unsupported file operation: {operation}")
@@ -0,0 +1,176 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# JSON schema type name -> accepted Python types
+PARAMETER_TYPES = {
+    'string': (str,),
+    'integer': (int,),
+    'number': (int, float),
+    'boolean': (bool,),
+    'array': (list,),
+    'object': (dict,)
+}
+
+# Parameters every node type accepts, merged into each registered schema
+COMMON_PARAMETERS = {
+    'agent_labels': {
+        'type': 'array',
+        'items': {'type': 'string'},
+        'description': 'Capability labels an agent needs to run this node (remote backend)'
+    },
+    'input_files': {
+        'type': 'array',
+        'items': {'type': 'string'},
+        'description': 'Paths or globs whose changes invalidate an incremental run of this step'
+    },
+    'output_files': {
+        'type': 'array',
+        'items': {'type': 'string'},
+        'description': 'Paths or globs that must still exist for an incremental run to skip this step'
+    }
+}
+
+
+class ConfigValidationError(ValueError):
+    """Raised when a node configuration does not match its node type's schema"""
+
+    def __init__(self, errors, subject=None):
+        self.errors = errors
+        self.subject = subject
+        prefix = f"{subject}: " if subject else ''
+        super().__init__(prefix + '; '.join(errors))
+
+
+def _compile_parameter(key, spec):
+    """Build the check for one parameter, resolving its type once"""
+    type_name = spec.get('type', 'string')
+    if type_name not in PARAMETER_TYPES:
+        raise ValueError(f"Unknown parameter type for {key}: {type_name}")
+    accepted = PARAMETER_TYPES[type_name]
+    enum = frozenset(spec['enum']) if 'enum' in spec else None
+    check_item = _compile_parameter(f"{key} items", spec['items']) if 'items' in spec else None
+
+    def check(value):
+        # bool is an int subclass, so reject it explicitly for numeric parameters
+        if not isinstance(value, accepted) or (isinstance(value, bool) and bool not in accepted):
+            return f"{key} must be of type {type_name}"
+        if enum is not None and value not in enum:
+            return f"{key} must be one of: {', '.join(sorted(enum))}"
+        if check_item is not None:
+            for item in value:
+                error = check_item(item)
+                if error:
+                    return error
+        return None
+
+    return check
+
+
+class NodeType:
+    """A registered node type: its handler, parameter schema and compiled validator"""
+
+    def __init__(self, key, name, description, parameters, handler, check=None, cacheable=True):
+        self.key = key
+        self.name = name
+        self.description = description
+        self.parameters = dict(parameters)
+        for common_key, spec in COMMON_PARAMETERS.items():
+            self.parameters.setdefault(common_key, spec)
+        self.handler = handler
+        self.check = check
+        self.cacheable = cacheable
+        self._required = tuple(key for key, spec in self.parameters.items() if spec.get('required'))
+        self._checks = tuple((key, _compile_parameter(key, spec)) for key, spec in self.parameters.items())
+
+    def validate(self, config, partial=False):
+        """Return a list of problems with config; empty when valid.
+
+        partial skips required-parameter and cross-field checks, for configs
+        that may still be completed by step or run parameters.
+        """
+        errors = []
+        if not isinstance(config, dict):
+            return ['configuration must be an object']
+
+        if not partial:
+            for key in self._required:
+                if config.get(key) is None:
+                    errors.append(f"{key} is required")
+
+        for key, check in self._checks:
+            value = config.get(key)
+            if value is not None:
+                error = check(value)
+                if error:
+                    errors.append(error)
+
+        if not partial and not errors and self.check:
+            errors.extend(self.check(config))
+        return errors
+
+    def to_dict(self):
+        """Convert node type to dictionary for JSON response"""
+        return {
+            'name': self.name,
+            'description': self.description,
+            'parameters': self.parameters
+        }
+
+
+_registry = {}
+_schemas = None
+
+
+def register_node_type(key, name, description, parameters, check=None, cacheable=True):
+    """Decorator registering a handler as the implementation of a node type.
+
+    parameters is the node-specific schema; COMMON_PARAMETERS are added to it.
+    The handler is called as handler(executor, config) and may be a generator
+    yielding command_runner.Command objects. check(config), if given, returns a
+    list of cross-field errors and runs after the per-parameter checks.
+    cacheable=False marks types whose effect is process-local, which
+    incremental workflow runs must always re-execute.
+    """
+    def decorator(handler):
+        global _schemas
+        if key in _registry:
+            logger.warning(f"Replacing registered node type: {key}")
+        _registry[key] = NodeType(key, name, description, parameters, handler, check, cacheable)
+        _schemas = None
+        return handler
+    return decorator
+
+
+def _load_builtin_types():
+    # The built-in handlers register themselves when node_executor is imported
+    import node_executor  # noqa: F401
+
+
+def get_registry():
+    """All registered node types keyed by node_type"""
+    _load_builtin_types()
+    return _registry
+
+
+def get_node_type(key):
+    """Look up a registered node type, or None"""
+    return get_registry().get(key)
+
+
+def get_schemas():
+    """Node type schemas for the API, built once per registry change"""
+    global _schemas
+    if _schemas is None:
+        _schemas = {key: node_type.to_dict() for key, node_type in get_registry().items()}
+    return _schemas
+
+
+def validate_config(node_type, config, partial=False, subject=None):
+    """Raise ConfigValidationError unless config is valid for node_type"""
+    registered = get_node_type(node_type)
+    if registered is None:
+        raise ConfigValidationError([f"Unsupported node type: {node_type}"], subject)
+    errors = registered.validate(config, partial)
+    if errors:
+        raise ConfigValidationError(errors, subject)
@@ -0,0 +1,93 @@
+from collections import deque
+
+# Characters of a single step's output kept in a workflow's aggregate output
+STEP_OUTPUT_LIMIT = 64 * 1024
+# Characters kept in a workflow's aggregate output overall
+TOTAL_OUTPUT_LIMIT = 1024 * 1024
+
+
+def elision_marker(characters, lines):
+    return f"... [{characters} characters, {lines} lines elided; see the full step logs] ..."
+
+
+def truncate_middle(text, limit):
+    """Keep the head and tail of text within limit characters (plus a marker).
+
+    The cut points are moved to line boundaries where possible. Returns the
+    shortened text and the number of characters elided.
+    """
+    if len(text) <= limit:
+        return text, 0
+
+    head_end = limit // 2
+    newline = text.rfind('\n', 0, head_end)
+    if newline > 0:
+        head_end = newline
+
+    tail_start = len(text) - (limit - head_end)
+    newline = text.find('\n', tail_start, len(text) - 1)
+    if newline != -1:
+        tail_start = newline + 1
+
+    elided = tail_start - head_end
+    marker = elision_marker(elided, text.count('\n', head_end, tail_start))
+    return f"{text[:head_end]}\n{marker}\n{text[tail_start:]}", elided
+
+
+class OutputAggregator:
+    """Bounded collector for the combined output of a workflow's steps.
+
+    Each block (a step header or a step's output) is capped to step_limit.
+    The first half of total_limit keeps the earliest blocks; once it is full,
+    later blocks go to a tail that drops its oldest blocks to stay within the
+    other half. Whatever is dropped is replaced by a single elision marker,
+    so memory stays bounded however much the steps print.
+    """
+
+    def __init__(self, step_limit=STEP_OUTPUT_LIMIT, total_limit=TOTAL_OUTPUT_LIMIT):
+        self.step_limit = step_limit
+        self.head_limit = total_limit // 2
+        self.tail_limit = total_limit - self.head_limit
+        self.truncated = False
+        self._head = []
+        self._head_size = 0
+        self._tail = deque()
+        self._tail_size = 0
+        self._dropped_chars = 0
+        self._dropped_lines = 0
+
+    def append(self, text):
+        """Add a block of output"""
+        text, elided = truncate_middle(text, self.step_limit)
+        if elided:
+            self.truncated = True
+        size = len(text) + 1
+
+        if not self._tail and self._head_size + size <= self.head_limit:
+            self._head.append(text)
+            self._head_size += size
+            return
+
+        self._tail.append(text)
+        self._tail_size += size
+        while self._tail_size > self.tail_limit and len(self._tail) > 1:
+            dropped = self._tail.popleft()
+            self._tail_size -= len(dropped) + 1
+            self._dropped_chars += len(dropped) + 1
+            self._dropped_lines += dropped.count('\n') + 1
+            self.truncated = True
+
+        if self._tail_size > self.tail_limit:
+            # A single block bigger than the whole tail budget
+            text, elided = truncate_middle(self._tail.pop(), self.tail_limit - 1)
+            self._tail.append(text)
+            self._tail_size = len(text) + 1
+            self.truncated = True
+
+    def text(self):
+        """The retained output, with a marker where blocks were dropped"""
+        parts = list(self._head)
+        if self._dropped_chars:
+            parts.append(elision_marker(self._dropped_chars, self._dropped_lines))
+        parts.extend(self._tail)
+        return '\n'.join(parts)
@@ -0,0 +1,95 @@
+import time
+import logging
+from database import db
+from models import AgentTask
+from node_executor import NodeExecutor
+import cancellation
+import dispatcher
+from cancellation import CancellationToken
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of a queued/running task's status
+POLL_INTERVAL = 0.5
+# Seconds between checks for agents that went silent while holding a task
+STALE_CHECK_INTERVAL = 5
+# Seconds a task may wait for an agent to claim it, unless the node sets its own timeout
+CLAIM_TIMEOUT = 300
+
+
+class RemoteNodeExecutor(NodeExecutor):
+    """Executor backend that hands node runs to remote agents.
+
+    Each run is queued as an AgentTask and this executor waits for an agent
+    (see agent.py) to claim and finish it. Cancelling the token, or running
+    out of workflow deadline, cancels the task on the agent. A task nobody
+    claims within the node's timeout (or CLAIM_TIMEOUT) fails.
+    """
+
+    def execute_node(self, node, parameters=None, token=None, labels=None):
+        """Queue a node for agents and wait for the result.
+
+        Raises dispatcher.NoCapableAgent if no online agent could run it.
+        """
+        try:
+            task = dispatcher.enqueue(node, parameters, labels)
+        except dispatcher.NoCapableAgent:
+            db.session.rollback()
+            raise
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to queue node {node.name}: {str(e)}")
+            return {'success': False, 'error': str(e), 'cancelled': False, 'execution_id': None}
+
+        token = token.child() if token else CancellationToken()
+        cancellation.register('node', task.node_execution_id, token)
+        task_id = task.id
+        claim_timeout = token.timeout_for(self._merge_config(node, parameters).get('timeout') or CLAIM_TIMEOUT)
+
+        stopping = False
+        queued_since = time.monotonic()
+        next_stale_check = queued_since + STALE_CHECK_INTERVAL
+        try:
+            while True:
+                # End the transaction so the agent's updates become visible
+                db.session.commit()
+                task = db.session.get(AgentTask, task_id)
+
+                if task.status in dispatcher.FINISHED_TASK_STATUSES:
+                    break
+                if token.cancelled or token.deadline_exceeded() or dispatcher.cancel_requested(task):
+                    if not stopping or task.status == 'queued':
+                        reason = 'Workflow deadline exceeded' if token.deadline_exceeded() else 'Execution cancelled'
+                        dispatcher.cancel_task(task, reason)
+                        stopping = True
+                    if task.status == 'cancelled':
+                        break
+
+                now = time.monotonic()
+                if task.status != 'queued':
+                    queued_since = now
+                elif not stopping and now - queued_since > claim_timeout:
+                    reason = f"No agent claimed the task within {claim_timeout:g}s"
+                    if dispatcher.expire_task(task, reason):
+                        break
+                if now >= next_stale_check:
+                    # Claims also do this, but not if the only capable agent died
+                    dispatcher.requeue_stale_tasks()
+                    next_stale_check = now + STALE_CHECK_INTERVAL
+
+                if stopping:
+                    # Waiting for the agent to report back after killing the run
+                    time.sleep(POLL_INTERVAL)
+                else:
+                    token.wait(POLL_INTERVAL)
+
+            return {
+                'success': task.status == 'success',
+                'output': task.output or '',
+                'error': task.error_message or task.node_execution.error_message,
+                'cancelled': task.status == 'cancelled',
+                'execution_id': task.node_execution_id
+            }
+
+        finally:
+            cancellation.unregister('node', task.node_execution_id)
@@ -1,19 +1,66 @@
-from flask import render_template, request, jsonify, abort, Blueprint
+from flask import render_template, request, jsonify, abort, Blueprint, current_app
 from database import db
-from models import Node, Workflow, WorkflowStep, NodeExecution, WorkflowExecution
-from node_executor import NodeExecutor
-from workflow_engine import WorkflowEngine
-import json
+from models import Node, Workflow, WorkflowStep, NodeExecution, WorkflowExecution, WorkflowSchedule, Agent, AgentTask
 import logging
+from datetime import datetime
+import cancellation
+import analytics
+import node_types
+import dispatcher
+import schedules
+from scheduler import scheduler
 
 logger = logging.getLogger(__name__)
 
 # Create blueprint for routes
 bp = Blueprint('main', __name__)
 
-# Initialize executors
-node_executor = NodeExecutor()
-workflow_engine = WorkflowEngine()
+EXECUTOR_BACKENDS = ('sync', 'async', 'remote')
+
+# Executors are created on first use so importing the blueprint stays cheap
+_node_executors = {}
+_workflow_engines = {}
+
+
+def get_backend(data):
+    """Resolve the executor backend from the request body or app configuration"""
+    backend = data.get('backend') or current_app.config.get('NODE_EXECUTOR_BACKEND', 'sync')
+    if backend not in EXECUTOR_BACKENDS:
+        abort(400, description=f"Unsupported executor backend: {backend}")
+    return backend
+
+
+def get_timeout(data):
+    """Resolve an optional workflow deadline in seconds from the request body"""
+    timeout = data.get('timeout')
+    if timeout is None:
+        return None
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+        abort(400, description='timeout must be a positive number of seconds')
+    return timeout
+
+
+def get_node_executor(backend='sync'):
+    """Get the node executor for a backend, creating it on first use"""
+    if backend not in _node_executors:
+        if backend == 'async':
+            from async_executor import AsyncNodeExecutor
+            _node_executors[backend] = AsyncNodeExecutor()
+        elif backend == 'remote':
+            from remote_executor import RemoteNodeExecutor
+            _node_executors[backend] = RemoteNodeExecutor()
+        else:
+            from node_executor import NodeExecutor
+            _node_executors[backend] = NodeExecutor()
+    return _node_executors[backend]
+
+
+def get_workflow_engine(backend='sync'):
+    """Get the workflow engine for a backend, creating it on first use"""
+    if backend not in _workflow_engines:
+        from workflow_engine import WorkflowEngine
+        _workflow_engines[backend] = WorkflowEngine(get_node_executor(backend))
+    return _workflow_engines[backend]
 
 
 @bp.route('/')
@@ -39,12 +86,14 @@ def create_node():
     if not data or not data.get('name') or not data.get('node_type'):
         return jsonify({'error': 'Name and node_type are required'}), 400
     
+    node_types.validate_config(data['node_type'], data.get('configuration', {}), partial=True)
+    
     try:
         node = Node(
             name=data['name'],
             node_type=data['node_type'],
             description=data.get('description', ''),
-            configuration=json.dumps(data.get('configuration', {}))
+            configuration=data.get('configuration', {})
         )
         
         db.session.add(node)
@@ -75,6 +124,12 @@ def update_node(node_id):
     if not data:
         return jsonify({'error': 'No data provided'}), 400
     
+    node_types.validate_config(
+        data.get('node_type', node.node_type),
+        data['configuration'] if 'configuration' in data else node.get_config(),
+        partial=True
+    )
+    
     try:
         if 'name' in data:
             node.name = data['name']
@@ -83,7 +138,7 @@ def update_node(node_id):
         if 'description' in data:
             node.description = data['description']
         if 'configuration' in data:
-            node.configuration = json.dumps(data['configuration'])
+            node.configuration = data['configuration']
         
         db.session.commit()
         
@@ -121,9 +176,10 @@ def execute_node(node_id):
     data = request.get_json() or {}
     
     parameters = data.get('parameters', {})
+    backend = get_backend(data)
     
     try:
-        result = node_executor.execute_node(node, parameters)
+        result = get_node_executor(backend).run(node, parameters)
         
         if result['success']:
             return jsonify({
@@ -135,14 +191,67 @@ def execute_node(node_id):
             return jsonify({
                 'success': False,
                 'error': result['error'],
-                'node_name': node.name
+                'node_name': node.name,
+                'cancelled': result.get('cancelled', False)
             }), 400
+    
+    except dispatcher.NoCapableAgent:
+        # Reported by the no_capable_agent handler
+        raise
             
     except Exception as e:
         logger.error(f"Failed to execute node {node_id}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/api/nodes/execute-batch', methods=['POST'])
+def execute_node_batch():
+    """Execute several nodes concurrently on the asyncio backend"""
+    data = request.get_json() or {}
+    runs_data = data.get('runs')
+    
+    if not runs_data:
+        return jsonify({'error': 'runs is required'}), 400
+    
+    runs = []
+    for run_data in runs_data:
+        if 'node_id' not in run_data:
+            return jsonify({'error': 'Each run must have node_id'}), 400
+        runs.append((Node.query.get_or_404(run_data['node_id']), run_data.get('parameters', {})))
+    
+    # Imported here so the blueprint does not load the async backend up front
+    from async_executor import DEFAULT_CONCURRENCY
+    concurrency = data.get('concurrency', DEFAULT_CONCURRENCY)
+    if isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency < 1:
+        return jsonify({'error': 'concurrency must be a positive integer'}), 400
+    
+    try:
+        import asyncio
+        results = asyncio.run(get_node_executor('async').execute_nodes(runs, concurrency))
+        
+        return jsonify({
+            'success': all(result['success'] for result in results),
+            'results': [
+                dict(result, node_id=node.id, node_name=node.name)
+                for (node, _), result in zip(runs, results)
+            ]
+        })
+        
+    except Exception as e:
+        logger.error(f"Failed to execute node batch: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/nodes/<int:node_id>/dispatch', methods=['POST'])
+def dispatch_node(node_id):
+    """Queue a node for remote agents without waiting for the result"""
+    node = Node.query.get_or_404(node_id)
+    data = request.get_json() or {}
+    
+    task = dispatcher.enqueue(node, data.get('parameters', {}), data.get('labels'))
+    return jsonify(task.to_dict()), 202
+
+
 # Workflow Management Routes
 
 @bp.route('/api/workflows', methods=['GET'])
@@ -160,6 +269,8 @@ def create_workflow():
     if not data or not data.get('name'):
         return jsonify({'error': 'Name is required'}), 400
     
+    _validate_steps(data.get('steps', []))
+    
     try:
         workflow = Workflow(
             name=data['name'],
@@ -179,7 +290,7 @@ def create_workflow():
                     workflow_id=workflow.id,
                     node_id=step_data['node_id'],
                     order=step_data['order'],
-                    parameters=json.dumps(step_data.get('parameters', {}))
+                    parameters=step_data.get('parameters') or {}
                 )
                 db.session.add(step)
         
@@ -194,6 +305,34 @@ def create_workflow():
         return jsonify({'error': str(e)}), 500
 
 
+def _validate_steps(steps_data):
+    """Check each step's node exists and its merged configuration is well-typed"""
+    errors = []
+    for step_data in steps_data:
+        if 'node_id' not in step_data or 'order' not in step_data:
+            continue
+        node = db.session.get(Node, step_data['node_id'])
+        if node is None:
+            errors.append(f"Step {step_data['order']}: node {step_data['node_id']} not found")
+            continue
+        
+        subject = f"Step {step_data['order']} ({node.name})"
+        parameters = step_data.get('parameters') or {}
+        if not isinstance(parameters, dict):
+            errors.append(f"{subject}: parameters must be an object")
+            continue
+        
+        config = node.get_config()
+        config.update(parameters)
+        try:
+            node_types.validate_config(node.node_type, config, partial=True, subject=subject)
+        except node_types.ConfigValidationError as e:
+            errors.append(str(e))
+    
+    if errors:
+        raise node_types.ConfigValidationError(errors)
+
+
 @bp.route('/api/workflows/<int:workflow_id>', methods=['GET'])
 def get_workflow(workflow_id):
     """Get a specific workflow"""
@@ -210,6 +349,8 @@ def update_workflow(workflow_id):
     if not data:
         return jsonify({'error': 'No data provided'}), 400
     
+    _validate_steps(data.get('steps', []))
+    
     try:
         if 'name' in data:
             workflow.name = data['name']
@@ -230,7 +371,7 @@ def update_workflow(workflow_id):
                     workflow_id=workflow.id,
                     node_id=step_data['node_id'],
                     order=step_data['order'],
-                    parameters=json.dumps(step_data.get('parameters', {}))
+                    parameters=step_data.get('parameters') or {}
                 )
                 db.session.add(step)
         
@@ -270,24 +411,36 @@ def execute_workflow(workflow_id):
     data = request.get_json() or {}
     
     parameters = data.get('parameters', {})
+    backend = get_backend(data)
+    timeout = get_timeout(data)
     
     try:
-        result = workflow_engine.execute_workflow(workflow, parameters)
+        result = get_workflow_engine(backend).execute_workflow(
+            workflow,
+            parameters,
+            timeout=timeout,
+            incremental=data.get('incremental', False)
+        )
+        
+        # Output is bounded by the engine; full step logs are behind each step's log_url
+        summary = {
+            'output': result['output'],
+            'output_truncated': result['output_truncated'],
+            'execution_id': result['execution_id'],
+            'workflow_name': workflow.name,
+            'log_url': result['log_url'],
+            'steps': result['steps']
+        }
         
         if result['success']:
-            return jsonify({
-                'success': True,
-                'output': result['output'],
-                'execution_id': result['execution_id'],
-                'workflow_name': workflow.name
-            })
+            return jsonify(dict(summary, success=True, reused_steps=result.get('reused_steps', 0)))
         else:
-            return jsonify({
-                'success': False,
-                'error': result['error'],
-                'execution_id': result['execution_id'],
-                'workflow_name': workflow.name
-            }), 400
+            return jsonify(dict(summary, success=False, error=result['error'],
+                                cancelled=result.get('cancelled', False))), 400
+    
+    except node_types.ConfigValidationError:
+        # Rejected before any step ran; reported by the invalid_configuration handler
+        raise
             
     except Exception as e:
         logger.error(f"Failed to execute workflow {workflow_id}: {str(e)}")
@@ -302,7 +455,9 @@ def get_node_executions():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     
-    executions = NodeExecution.query.order_by(NodeExecution.start_time.desc()).paginate(
+    executions = NodeExecution.query.options(
+        db.joinedload(NodeExecution.node), db.joinedload(NodeExecution.parameter_set)
+    ).order_by(NodeExecution.start_time.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
@@ -336,71 +491,355 @@ def get_workflow_executions():
 def get_workflow_execution(execution_id):
     """Get specific workflow execution details"""
     execution = WorkflowExecution.query.get_or_404(execution_id)
+    return jsonify(dict(execution.to_dict(), steps=[step_run.to_dict() for step_run in execution.step_runs]))
+
+
+@bp.route('/api/executions/nodes/<int:execution_id>', methods=['GET'])
+def get_node_execution(execution_id):
+    """Get specific node execution details, including its full output"""
+    execution = NodeExecution.query.get_or_404(execution_id)
     return jsonify(execution.to_dict())
 
 
+@bp.route('/api/executions/nodes/<int:execution_id>/cancel', methods=['POST'])
+def cancel_node_execution(execution_id):
+    """Cancel a running node execution"""
+    execution = NodeExecution.query.get_or_404(execution_id)
+    return _cancel_execution('node', execution)
+
+
+@bp.route('/api/executions/workflows/<int:execution_id>/cancel', methods=['POST'])
+def cancel_workflow_execution(execution_id):
+    """Cancel a running workflow execution"""
+    execution = WorkflowExecution.query.get_or_404(execution_id)
+    return _cancel_execution('workflow', execution)
+
+
+def _cancel_execution(kind, execution):
+    """Mark an execution cancelled and kill its processes if it runs in this process.
+    
+    Executions running in another worker process poll for the cancelled
+    status while their commands run and kill them when they see it.
+    """
+    if execution.status not in ('pending', 'running'):
+        return jsonify({'error': f"Execution is already {execution.status}"}), 409
+    
+    try:
+        execution.status = 'cancelled'
+        execution.error_message = 'Execution cancelled'
+        execution.end_time = datetime.utcnow()
+        db.session.commit()
+        
+        killed = cancellation.cancel(kind, execution.id)
+        
+        logger.info(f"Cancelled {kind} execution {execution.id}")
+        return jsonify(dict(execution.to_dict(), cancelled_in_process=killed))
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to cancel {kind} execution {execution.id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+# Schedule Routes
+
+@bp.route('/api/schedules', methods=['GET'])
+def get_schedules():
+    """Get all workflow schedules"""
+    workflow_schedules = WorkflowSchedule.query.order_by(WorkflowSchedule.id).all()
+    return jsonify([schedule.to_dict() for schedule in workflow_schedules])
+
+
+@bp.route('/api/workflows/<int:workflow_id>/schedules', methods=['GET'])
+def get_workflow_schedules(workflow_id):
+    """Get the schedules of a workflow"""
+    workflow = Workflow.query.get_or_404(workflow_id)
+    return jsonify([schedule.to_dict() for schedule in workflow.schedules])
+
+
+@bp.route('/api/workflows/<int:workflow_id>/schedules', methods=['POST'])
+def create_schedule(workflow_id):
+    """Schedule recurring runs of a workflow"""
+    workflow = Workflow.query.get_or_404(workflow_id)
+    data = request.get_json() or {}
+    
+    try:
+        schedule = WorkflowSchedule(workflow_id=workflow.id, jitter=0, enabled=True)
+        schedules.configure(schedule, data)
+        
+        db.session.add(schedule)
+        db.session.commit()
+        scheduler.notify(schedule)
+        
+        logger.info(f"Created schedule {schedule.id} for workflow {workflow.name}")
+        return jsonify(schedule.to_dict()), 201
+    
+    except schedules.ScheduleError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to create schedule for workflow {workflow_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/schedules/<int:schedule_id>', methods=['GET'])
+def get_schedule(schedule_id):
+    """Get a specific schedule"""
+    schedule = WorkflowSchedule.query.get_or_404(schedule_id)
+    return jsonify(schedule.to_dict())
+
+
+@bp.route('/api/schedules/<int:schedule_id>', methods=['PUT'])
+def update_schedule(schedule_id):
+    """Update a schedule"""
+    schedule = WorkflowSchedule.query.get_or_404(schedule_id)
+    data = request.get_json() or {}
+    
+    try:
+        schedules.configure(schedule, data)
+        db.session.commit()
+        scheduler.notify(schedule)
+        
+        logger.info(f"Updated schedule {schedule.id}")
+        return jsonify(schedule.to_dict())
+    
+    except schedules.ScheduleError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to update schedule {schedule_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/schedules/<int:schedule_id>', methods=['DELETE'])
+def delete_schedule(schedule_id):
+    """Delete a schedule"""
+    schedule = WorkflowSchedule.query.get_or_404(schedule_id)
+    
+    try:
+        db.session.delete(schedule)
+        db.session.commit()
+        
+        logger.info(f"Deleted schedule {schedule_id}")
+        return '', 204
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to delete schedule {schedule_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/schedules/<int:schedule_id>/trigger', methods=['POST'])
+def trigger_schedule(schedule_id):
+    """Start a schedule's workflow now, in the background"""
+    schedule = WorkflowSchedule.query.get_or_404(schedule_id)
+    
+    try:
+        if not scheduler.trigger(schedule):
+            return jsonify({'error': 'Workflow is already running'}), 409
+        return jsonify(schedule.to_dict()), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to trigger schedule {schedule_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+# Agent Routes
+
+@bp.route('/api/agents', methods=['GET'])
+def get_agents():
+    """Get all registered agents"""
+    agents = Agent.query.all()
+    return jsonify([agent.to_dict() for agent in agents])
+
+
+@bp.route('/api/agents', methods=['POST'])
+def register_agent():
+    """Register a remote executor agent"""
+    data = request.get_json()
+    
+    if not data or not data.get('name'):
+        return jsonify({'error': 'Name is required'}), 400
+    
+    try:
+        agent = dispatcher.register_agent(data['name'], data.get('labels', []))
+        return jsonify(agent.to_dict()), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to register agent: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/agents/<int:agent_id>/heartbeat', methods=['POST'])
+def agent_heartbeat(agent_id):
+    """Record that an agent is alive"""
+    agent = Agent.query.get_or_404(agent_id)
+    dispatcher.heartbeat(agent)
+    db.session.commit()
+    return jsonify(agent.to_dict())
+
+
+@bp.route('/api/agents/<int:agent_id>/claim', methods=['POST'])
+def agent_claim(agent_id):
+    """Claim the next queued task matching the agent's labels"""
+    agent = Agent.query.get_or_404(agent_id)
+    
+    try:
+        task = dispatcher.claim(agent)
+        if task is None:
+            return '', 204
+        return jsonify(task.to_dict())
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Agent {agent_id} failed to claim a task: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/agent-tasks/<int:task_id>', methods=['GET'])
+def get_agent_task(task_id):
+    """Get a specific agent task"""
+    task = AgentTask.query.get_or_404(task_id)
+    return jsonify(task.to_dict())
+
+
+@bp.route('/api/agent-tasks/<int:task_id>/output', methods=['POST'])
+def agent_task_output(task_id):
+    """Append streamed output; the response tells the agent whether to stop"""
+    task = AgentTask.query.get_or_404(task_id)
+    data = request.get_json() or {}
+    
+    if not dispatcher.owned_by(task, data.get('agent_id')):
+        # Stale report, e.g. from an agent whose task was requeued: tell it to stop
+        return jsonify({'error': 'Task is not running on this agent', 'cancel_requested': True}), 409
+    
+    return jsonify({'cancel_requested': dispatcher.append_output(task, data.get('output', ''))})
+
+
+@bp.route('/api/agent-tasks/<int:task_id>/complete', methods=['POST'])
+def agent_task_complete(task_id):
+    """Record the final result of an agent task"""
+    task = AgentTask.query.get_or_404(task_id)
+    data = request.get_json() or {}
+    
+    if task.status != 'running':
+        return jsonify({'error': f"Task is {task.status}"}), 409
+    if not dispatcher.owned_by(task, data.get('agent_id')):
+        return jsonify({'error': 'Task is not running on this agent'}), 409
+    
+    try:
+        dispatcher.complete(
+            task,
+            data.get('success', False),
+            output=data.get('output'),
+            error=data.get('error'),
+            cancelled=data.get('cancelled', False)
+        )
+        return jsonify(task.to_dict())
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to complete agent task {task_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+# Analytics Routes
+
+def _analytics_window():
+    """Parse the since/until/granularity query parameters of the analytics routes"""
+    try:
+        since = request.args.get('since')
+        until = request.args.get('until')
+        since = datetime.fromisoformat(since) if since else analytics.default_since()
+        until = datetime.fromisoformat(until) if until else None
+    except ValueError as e:
+        abort(400, description=f"Invalid date: {str(e)}")
+    
+    granularity = request.args.get('granularity')
+    if granularity and granularity not in analytics.GRANULARITIES:
+        abort(400, description=f"Unsupported granularity: {granularity}")
+    
+    return since, until, granularity
+
+
+@bp.route('/api/analytics/nodes', methods=['GET'])
+def get_node_analytics():
+    """Get execution statistics for every node (default window: last 7 days)"""
+    since, until, _ = _analytics_window()
+    report = analytics.scope_report('node', since, until)
+    return jsonify({
+        'since': since.isoformat(),
+        'until': until.isoformat() if until else None,
+        'nodes': report
+    })
+
+
+@bp.route('/api/analytics/nodes/<int:node_id>', methods=['GET'])
+def get_node_analytics_detail(node_id):
+    """Get execution statistics for a node, optionally as an hourly/daily series"""
+    node = Node.query.get_or_404(node_id)
+    since, until, granularity = _analytics_window()
+    report = analytics.subject_report('node', node.id, since, until, granularity)
+    return jsonify(dict(report, node_id=node.id, node_name=node.name, since=since.isoformat()))
+
+
+@bp.route('/api/analytics/workflows', methods=['GET'])
+def get_workflow_analytics():
+    """Get execution statistics for every workflow (default window: last 7 days)"""
+    since, until, _ = _analytics_window()
+    report = analytics.scope_report('workflow', since, until)
+    return jsonify({
+        'since': since.isoformat(),
+        'until': until.isoformat() if until else None,
+        'workflows': report
+    })
+
+
+@bp.route('/api/analytics/workflows/<int:workflow_id>', methods=['GET'])
+def get_workflow_analytics_detail(workflow_id):
+    """Get execution statistics for a workflow, optionally as an hourly/daily series"""
+    workflow = Workflow.query.get_or_404(workflow_id)
+    since, until, granularity = _analytics_window()
+    report = analytics.subject_report('workflow', workflow.id, since, until, granularity)
+    return jsonify(dict(report, workflow_id=workflow.id, workflow_name=workflow.name, since=since.isoformat()))
+
+
 # Node Type Information
 
 @bp.route('/api/node-types', methods=['GET'])
 def get_node_types():
     """Get available node types and their configuration schemas"""
-    node_types = {
-        'git_clone': {
-            'name': 'Git Clone',
-            'description': 'Clone a Git repository',
-            'parameters': {
-                'url': {'type': 'string', 'required': True, 'description': 'Git repository URL'},
-                'branch': {'type': 'string', 'required': False, 'default': 'main', 'description': 'Branch to clone'},
-                'target_dir': {'type': 'string', 'required': False, 'default': './cloned_repo', 'description': 'Target directory'}
-            }
-        },
-        'env_setup': {
-            'name': 'Environment Setup',
-            'description': 'Set environment variables',
-            'parameters': {
-                'environment_variables': {'type': 'object', 'required': True, 'description': 'Key-value pairs of environment variables'}
-            }
-        },
-        'dependency_install': {
-            'name': 'Dependency Installation',
-            'description': 'Install dependencies using package managers',
-            'parameters': {
-                'package_manager': {'type': 'string', 'required': False, 'default': 'pip', 'description': 'Package manager (pip, npm)'},
-                'packages': {'type': 'array', 'required': False, 'description': 'List of packages to install'},
-                'requirements_file': {'type': 'string', 'required': False, 'description': 'Path to requirements file'}
-            }
-        },
-        'shell_command': {
-            'name': 'Shell Command',
-            'description': 'Execute shell commands',
-            'parameters': {
-                'command': {'type': 'string', 'required': True, 'description': 'Command to execute'},
-                'working_dir': {'type': 'string', 'required': False, 'default': '.', 'description': 'Working directory'},
-                'timeout': {'type': 'integer', 'required': False, 'default': 300, 'description': 'Timeout in seconds'}
-            }
-        },
-        'file_operation': {
-            'name': 'File Operation',
-            'description': 'Perform file operations',
-            'parameters': {
-                'operation': {'type': 'string', 'required': True, 'description': 'Operation type (copy, move, delete, create)'},
-                'source': {'type': 'string', 'required': False, 'description': 'Source path'},
-                'destination': {'type': 'string', 'required': False, 'description': 'Destination path'},
-                'content': {'type': 'string', 'required': False, 'description': 'File content for create operation'}
-            }
-        }
-    }
-    
-    return jsonify(node_types)
+    return jsonify(node_types.get_schemas())
 
 
 # Error handlers
 
+@bp.errorhandler(400)
+def bad_request(error):
+    return jsonify({'error': error.description}), 400
+
+
 @bp.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Resource not found'}), 404
 
 
+@bp.errorhandler(node_types.ConfigValidationError)
+def invalid_configuration(error):
+    return jsonify({'error': str(error), 'details': error.errors}), 400
+
+
+@bp.errorhandler(dispatcher.NoCapableAgent)
+def no_capable_agent(error):
+    return jsonify({'error': str(error)}), 503
+
+
 @bp.errorhandler(500)
 def internal_error(error):
     db.session.rollback()
@@ -0,0 +1,244 @@
+import heapq
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from database import db
+from models import Workflow, WorkflowExecution, WorkflowSchedule
+import schedules
+
+logger = logging.getLogger(__name__)
+
+# Seconds between reloads of the schedule table, picking up changes made by other processes
+SYNC_INTERVAL = 60
+# Scheduled workflow runs executing at once in this process
+SCHEDULER_WORKERS = 4
+
+ACTIVE_STATUSES = ('pending', 'running')
+
+
+class Scheduler:
+    """Starts scheduled workflow runs when they are due.
+
+    A single thread sleeps until the earliest entry of a heap of
+    (start time, schedule id, nominal time) and hands due runs to a small
+    thread pool. Each occurrence is claimed with a conditional update of
+    next_run_at, so several processes can run a scheduler against one
+    database without starting a run twice.
+
+    A run is skipped while the workflow still has a pending or running
+    execution. An execution left running by a crashed process therefore
+    blocks its schedules until it is cancelled.
+    """
+
+    def __init__(self, workers=SCHEDULER_WORKERS):
+        self.app = None
+        self.workers = workers
+        self._heap = []
+        self._queued = {}  # schedule id -> nominal time of its current heap entry
+        self._running = set()  # workflow ids with a run started here and not finished
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = None
+        self._pool = None
+
+    def init_app(self, app):
+        """Attach to an app, starting the timer thread if SCHEDULER_ENABLED is set"""
+        self.app = app
+        app.extensions['scheduler'] = self
+        if app.config.get('SCHEDULER_ENABLED'):
+            self.start()
+
+    def start(self):
+        """Run the scheduler on a background thread"""
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self.run, name='workflow-scheduler', daemon=True)
+            self._thread.start()
+
+    def join(self, timeout=None):
+        """Wait for the background thread to finish"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+
+    def notify(self, schedule):
+        """Queue a new or changed schedule without waiting for the next sync"""
+        if schedule.enabled and schedule.next_run_at:
+            self._push(schedule, schedule.next_run_at)
+
+    def trigger(self, schedule):
+        """Start a schedule's workflow now; returns False if it is still running"""
+        return self._start(schedule)
+
+    def run(self):
+        """Dispatch due runs until stop() is called"""
+        logger.info("Workflow scheduler started")
+        with self.app.app_context():
+            next_sync = datetime.utcnow()
+            while not self._stopping:
+                now = datetime.utcnow()
+                if now >= next_sync:
+                    self._guarded(self._sync)
+                    next_sync = now + timedelta(seconds=SYNC_INTERVAL)
+
+                for schedule_id, nominal in self._pop_due(now):
+                    self._guarded(self._fire, schedule_id, nominal)
+
+                with self._condition:
+                    wake = min(next_sync, self._heap[0][0]) if self._heap else next_sync
+                    delay = (wake - datetime.utcnow()).total_seconds()
+                    if delay > 0 and not self._stopping:
+                        self._condition.wait(delay)
+
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+        logger.info("Workflow scheduler stopped")
+
+    def _guarded(self, func, *args):
+        """Run one scheduler step, keeping the loop alive if it fails"""
+        try:
+            func(*args)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Scheduler step {func.__name__} failed: {str(e)}")
+        finally:
+            db.session.remove()
+
+    def _push(self, schedule, nominal):
+        due = nominal + schedules.jitter_for(schedule, nominal)
+        with self._condition:
+            if self._queued.get(schedule.id) == nominal:
+                return
+            self._queued[schedule.id] = nominal
+            heapq.heappush(self._heap, (due, schedule.id, nominal))
+            self._condition.notify()
+
+    def _pop_due(self, now):
+        """Remove and return the (schedule id, nominal time) entries due by now"""
+        due = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                _, schedule_id, nominal = heapq.heappop(self._heap)
+                # Entries superseded by a later push for the same schedule are dropped
+                if self._queued.get(schedule_id) == nominal:
+                    del self._queued[schedule_id]
+                    due.append((schedule_id, nominal))
+        return due
+
+    def _sync(self):
+        """Load enabled schedules into the heap"""
+        for schedule in WorkflowSchedule.query.filter_by(enabled=True).all():
+            if schedule.next_run_at is None:
+                schedule.next_run_at = schedules.next_run_time(schedule, datetime.utcnow())
+                db.session.commit()
+            self._push(schedule, schedule.next_run_at)
+
+    def _fire(self, schedule_id, nominal):
+        """Claim a due occurrence, queue the following one and start the run"""
+        schedule = db.session.get(WorkflowSchedule, schedule_id)
+        if schedule is None or not schedule.enabled or schedule.next_run_at != nominal:
+            return  # Deleted, disabled or rescheduled since it was queued
+
+        now = datetime.utcnow()
+        missed = schedules.next_run_time(schedule, nominal) <= now
+        following = schedules.next_run_time(schedule, max(now, nominal))
+
+        claimed = db.session.execute(
+            update(WorkflowSchedule)
+            .where(WorkflowSchedule.id == schedule_id, WorkflowSchedule.next_run_at == nominal)
+            .values(next_run_at=following, last_run_at=now)
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            return  # Another process started this occurrence
+
+        db.session.refresh(schedule)
+        self._push(schedule, following)
+
+        if missed:
+            # Coalesce everything missed during downtime into this one run
+            logger.warning(f"Schedule {schedule_id} missed runs since {nominal.isoformat()}, running once")
+        self._start(schedule)
+
+    def _start(self, schedule):
+        """Start a run of the schedule's workflow unless one is already active"""
+        workflow_id = schedule.workflow_id
+        with self._condition:
+            busy = workflow_id in self._running
+            self._running.add(workflow_id)
+
+        if busy or self._has_active_execution(workflow_id):
+            if not busy:
+                self._release(workflow_id)
+            schedule.last_status = 'skipped'
+            db.session.commit()
+            logger.warning(f"Skipped scheduled run of workflow {workflow_id}: previous run still active")
+            return False
+
+        schedule.last_status = 'started'
+        db.session.commit()
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scheduled-run')
+        self._pool.submit(self._execute, schedule.id, workflow_id, dict(schedule.parameters or {}), schedule.timeout)
+        logger.info(f"Started scheduled run of workflow {workflow_id} (schedule {schedule.id})")
+        return True
+
+    def _has_active_execution(self, workflow_id):
+        return db.session.query(
+            WorkflowExecution.query.filter(
+                WorkflowExecution.workflow_id == workflow_id,
+                WorkflowExecution.status.in_(ACTIVE_STATUSES)
+            ).exists()
+        ).scalar()
+
+    def _release(self, workflow_id):
+        with self._condition:
+            self._running.discard(workflow_id)
+
+    def _execute(self, schedule_id, workflow_id, parameters, timeout):
+        """Run a scheduled workflow on a pool thread and record the outcome"""
+        # Imported here so creating the app does not build any executors
+        from routes import get_workflow_engine
+
+        with self.app.app_context():
+            execution_id = None
+            try:
+                workflow = db.session.get(Workflow, workflow_id)
+                backend = self.app.config.get('NODE_EXECUTOR_BACKEND', 'sync')
+                result = get_workflow_engine(backend).execute_workflow(workflow, parameters, timeout=timeout)
+                execution_id = result['execution_id']
+                if result['success']:
+                    status = 'success'
+                else:
+                    status = 'cancelled' if result.get('cancelled') else 'error'
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Scheduled run of workflow {workflow_id} failed: {str(e)}")
+                status = 'error'
+            finally:
+                self._release(workflow_id)
+
+            try:
+                db.session.execute(
+                    update(WorkflowSchedule)
+                    .where(WorkflowSchedule.id == schedule_id)
+                    .values(last_status=status, last_execution_id=execution_id)
+                )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Failed to record scheduled run of workflow {workflow_id}: {str(e)}")
+
+
+scheduler = Scheduler()
@@ -0,0 +1,172 @@
+import random
+import functools
+from datetime import datetime, timedelta, time
+
+# Five-field cron expressions: minute hour day-of-month month day-of-week
+CRON_FIELDS = (
+    ('minute', 0, 59),
+    ('hour', 0, 23),
+    ('day of month', 1, 31),
+    ('month', 1, 12),
+    ('day of week', 0, 7)
+)
+
+CRON_ALIASES = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *'
+}
+
+# Long enough to find a February 29th that falls on a given weekday
+MAX_SEARCH_DAYS = 366 * 9
+
+
+class ScheduleError(ValueError):
+    """Raised for an invalid schedule definition"""
+
+
+def _parse_field(text, name, low, high):
+    """Expand one cron field (*, n, a-b, */s, a-b/s and lists) into its values"""
+    values = set()
+    for part in text.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            if not step_text.isdigit() or int(step_text) < 1:
+                raise ScheduleError(f"Invalid step in cron {name} field: {text}")
+            step = int(step_text)
+
+        try:
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(bound) for bound in part.split('-', 1))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+        except ValueError:
+            raise ScheduleError(f"Invalid cron {name} field: {text}")
+
+        if start < low or end > high or start > end:
+            raise ScheduleError(f"Cron {name} field out of range {low}-{high}: {text}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    """Parsed cron expression, evaluated in UTC like the rest of the app"""
+
+    def __init__(self, expression):
+        self.expression = expression
+        fields = CRON_ALIASES.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise ScheduleError(f"Cron expression must have 5 fields: {expression}")
+
+        minutes, hours, days, months, weekdays = (
+            _parse_field(field, name, low, high) for field, (name, low, high) in zip(fields, CRON_FIELDS)
+        )
+        self.minutes = sorted(minutes)
+        self.hours = sorted(hours)
+        self.days = frozenset(days)
+        self.months = frozenset(months)
+        self.weekdays = frozenset(day % 7 for day in weekdays)  # 0 and 7 are both Sunday
+        # As in cron, when both day fields are restricted a day matching either runs
+        self._either_day = not fields[2].startswith('*') and not fields[4].startswith('*')
+
+    def _day_matches(self, day):
+        in_month = day.day in self.days
+        in_week = day.isoweekday() % 7 in self.weekdays
+        if self._either_day:
+            return in_month or in_week
+        return in_month and in_week
+
+    def next_after(self, after):
+        """The first matching minute strictly after the given datetime"""
+        start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+
+        for _ in range(MAX_SEARCH_DAYS):
+            if day.month in self.months and self._day_matches(day):
+                first_day = day == start.date()
+                for hour in self.hours:
+                    if first_day and hour < start.hour:
+                        continue
+                    for minute in self.minutes:
+                        if first_day and hour == start.hour and minute < start.minute:
+                            continue
+                        return datetime.combine(day, time(hour, minute))
+            day += timedelta(days=1)
+
+        raise ScheduleError(f"Cron expression never matches: {self.expression}")
+
+
+@functools.lru_cache(maxsize=256)
+def parse_cron(expression):
+    """Parse a cron expression, reusing earlier parses of the same text"""
+    return CronExpression(expression)
+
+
+def next_run_time(schedule, after):
+    """Nominal time of the schedule's first run strictly after the given time.
+
+    Interval schedules stay aligned to their previous run time. Runs missed
+    while nothing was scheduling are skipped rather than replayed, so after
+    downtime a schedule fires once and then continues on its normal cadence.
+    """
+    if schedule.cron:
+        return parse_cron(schedule.cron).next_after(after)
+
+    interval = timedelta(seconds=schedule.interval_seconds)
+    anchor = schedule.next_run_at
+    if anchor is None or anchor > after:
+        return after.replace(microsecond=0) + interval
+    return anchor + interval * ((after - anchor) // interval + 1)
+
+
+def jitter_for(schedule, nominal):
+    """Random start delay for one run, the same in every process running a scheduler"""
+    if not schedule.jitter:
+        return timedelta(0)
+    rng = random.Random(f"{schedule.id}:{nominal.isoformat()}")
+    return timedelta(seconds=rng.uniform(0, schedule.jitter))
+
+
+def configure(schedule, data):
+    """Apply and validate schedule settings from an API request body.
+
+    Exactly one of cron and interval_seconds must be set. The next run time
+    is recalculated whenever the timing changes.
+    """
+    timing_changed = schedule.next_run_at is None
+    for key in ('cron', 'interval_seconds'):
+        if key in data and data[key] != getattr(schedule, key):
+            setattr(schedule, key, data[key] or None)
+            timing_changed = True
+
+    for key in ('name', 'parameters', 'timeout', 'jitter', 'enabled'):
+        if key in data:
+            setattr(schedule, key, data[key])
+
+    if bool(schedule.cron) == bool(schedule.interval_seconds):
+        raise ScheduleError('Exactly one of cron and interval_seconds is required')
+    if schedule.cron is not None and not isinstance(schedule.cron, str):
+        raise ScheduleError('cron must be a string')
+    if schedule.interval_seconds is not None and (
+            not isinstance(schedule.interval_seconds, int) or schedule.interval_seconds < 1):
+        raise ScheduleError('interval_seconds must be a positive integer')
+    if schedule.jitter is not None and (not isinstance(schedule.jitter, (int, float)) or schedule.jitter < 0):
+        raise ScheduleError('jitter must be a non-negative number of seconds')
+    if schedule.timeout is not None and (not isinstance(schedule.timeout, (int, float)) or schedule.timeout <= 0):
+        raise ScheduleError('timeout must be a positive number of seconds')
+    if not isinstance(schedule.enabled, bool):
+        raise ScheduleError('enabled must be true or false')
+    if not isinstance(schedule.parameters or {}, dict):
+        raise ScheduleError('parameters must be an object')
+
+    if timing_changed:
+        schedule.next_run_at = None
+        schedule.next_run_at = next_run_time(schedule, datetime.utcnow())
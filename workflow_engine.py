@@ -1,9 +1,14 @@
 import logging
-import json
 from datetime import datetime
-from models import WorkflowExecution
+from models import WorkflowExecution, StepRun
 from database import db
 from node_executor import NodeExecutor
+import cancellation
+import analytics
+import node_types
+import fingerprints
+from output_limits import OutputAggregator, STEP_OUTPUT_LIMIT, TOTAL_OUTPUT_LIMIT
+from cancellation import CancellationToken, ExecutionCancelled
 
 logger = logging.getLogger(__name__)
 
@@ -11,11 +16,28 @@ logger = logging.getLogger(__name__)
 class WorkflowEngine:
     """Engine for executing workflows with multiple nodes"""
     
-    def __init__(self):
-        self.node_executor = NodeExecutor()
+    def __init__(self, node_executor=None, step_output_limit=STEP_OUTPUT_LIMIT, total_output_limit=TOTAL_OUTPUT_LIMIT):
+        self.node_executor = node_executor or NodeExecutor()
+        self.step_output_limit = step_output_limit
+        self.total_output_limit = total_output_limit
     
-    def execute_workflow(self, workflow, parameters=None):
-        """Execute a workflow with all its steps"""
+    def execute_workflow(self, workflow, parameters=None, timeout=None, incremental=False):
+        """Execute a workflow with all its steps.
+        
+        timeout is an optional workflow-level budget in seconds; each step's
+        own timeout is clamped to whatever is left of it. Raises
+        ConfigValidationError, before anything runs, if any step is invalid.
+        
+        Every step's input fingerprint is recorded as a StepRun. With
+        incremental=True a step whose fingerprint matches an earlier successful
+        run of this workflow reuses that run's output instead of executing.
+        
+        The combined output kept on the workflow execution and returned here
+        is bounded (see output_limits.py); each step's full output stays on
+        its node execution, linked from the per-step summary in 'steps'.
+        """
+        self.validate_workflow(workflow, parameters)
+        
         # Create workflow execution record
         execution = WorkflowExecution(
             workflow_id=workflow.id,
@@ -24,76 +46,190 @@ class WorkflowEngine:
         db.session.add(execution)
         db.session.commit()
         
-        output_lines = []
+        output = OutputAggregator(self.step_output_limit, self.total_output_limit)
+        steps = []
+        upstream = ''
+        reused_steps = 0
         
         try:
+            token = CancellationToken.with_timeout(timeout)
+            token.set_poll(lambda: self._was_cancelled(execution, token))
+            cancellation.register('workflow', execution.id, token)
+            
             logger.info(f"Starting execution of workflow: {workflow.name}")
             
             # Execute each step in order
             for i, step in enumerate(workflow.steps):
+                self._check_stopped(execution, token)
                 execution.current_step = i + 1
                 db.session.commit()
                 
                 logger.info(f"Executing step {i + 1}/{len(workflow.steps)}: {step.node.name}")
                 
                 # Merge step parameters with workflow parameters
-                step_params = json.loads(step.parameters) if step.parameters else {}
+                step_params = step.get_parameters()
                 if parameters:
                     step_params.update(parameters)
                 
-                # Execute the node
-                result = self.node_executor.execute_node(step.node, step_params)
+                config = step.node.get_config()
+                config.update(step_params)
+                fingerprint = fingerprints.step_fingerprint(step.node, config, upstream)
+                
+                previous = self._find_reusable(workflow, step.node, config, fingerprint) if incremental else None
+                if previous:
+                    # Inputs unchanged since a successful run: reuse its output
+                    result = {
+                        'success': True,
+                        'output': previous.node_execution.output or '',
+                        'execution_id': previous.node_execution_id
+                    }
+                    status = 'reused'
+                    reused_steps += 1
+                else:
+                    # Execute the node
+                    result = self.node_executor.run(step.node, step_params, token)
+                    status = 'success' if result['success'] else ('cancelled' if result.get('cancelled') else 'error')
+                
+                db.session.add(StepRun(
+                    workflow_execution_id=execution.id,
+                    node_execution_id=result.get('execution_id'),
+                    node_id=step.node.id,
+                    order=i + 1,
+                    fingerprint=fingerprint,
+                    status=status
+                ))
+                
+                steps.append(self._step_summary(i + 1, step.node, status, result))
                 
                 if result['success']:
-                    output_lines.append(f"Step {i + 1} ({step.node.name}): SUCCESS")
-                    output_lines.append(result['output'])
+                    output.append(f"Step {i + 1} ({step.node.name}): {status.upper()}")
+                    output.append(result['output'])
+                    upstream = fingerprints.chain(fingerprint, result['output'])
                 else:
                     # Workflow failed at this step
                     error_msg = f"Step {i + 1} ({step.node.name}) failed: {result['error']}"
-                    output_lines.append(error_msg)
+                    output.append(error_msg)
                     
-                    execution.status = 'error'
+                    execution.status = 'cancelled' if self._was_cancelled(execution, token) else 'error'
                     execution.error_message = error_msg
                     execution.end_time = datetime.utcnow()
-                    execution.output = '\n'.join(output_lines)
+                    execution.output = output.text()
+                    analytics.record_execution('workflow', workflow.id, execution)
                     db.session.commit()
                     
                     logger.error(f"Workflow {workflow.name} failed at step {i + 1}")
-                    return {
-                        'success': False,
-                        'error': error_msg,
-                        'execution_id': execution.id
-                    }
+                    return self._result(execution, output, steps, error=error_msg)
                 
-                output_lines.append('')  # Add blank line between steps
+                output.append('')  # Add blank line between steps
             
             # All steps completed successfully
+            self._check_stopped(execution, token)
             execution.status = 'success'
             execution.end_time = datetime.utcnow()
-            execution.output = '\n'.join(output_lines)
+            execution.output = output.text()
+            analytics.record_execution('workflow', workflow.id, execution)
             db.session.commit()
             
             logger.info(f"Workflow {workflow.name} completed successfully")
-            return {
-                'success': True,
-                'output': '\n'.join(output_lines),
-                'execution_id': execution.id
-            }
+            return self._result(execution, output, steps, reused_steps=reused_steps)
+            
+        except ExecutionCancelled as e:
+            execution.status = 'cancelled'
+            execution.error_message = str(e)
+            execution.end_time = datetime.utcnow()
+            execution.output = output.text()
+            analytics.record_execution('workflow', workflow.id, execution)
+            db.session.commit()
+            
+            logger.info(f"Workflow {workflow.name} cancelled")
+            return self._result(execution, output, steps, error=str(e))
             
         except Exception as e:
-            # Unexpected error during workflow execution
+            # Unexpected error during workflow execution (including DeadlineExceeded)
             execution.status = 'error'
             execution.error_message = str(e)
             execution.end_time = datetime.utcnow()
-            execution.output = '\n'.join(output_lines)
+            execution.output = output.text()
+            analytics.record_execution('workflow', workflow.id, execution)
             db.session.commit()
             
             logger.error(f"Workflow {workflow.name} failed with unexpected error: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e),
-                'execution_id': execution.id
-            }
+            return self._result(execution, output, steps, error=str(e))
+        
+        finally:
+            cancellation.unregister('workflow', execution.id)
+    
+    def _step_summary(self, order, node, status, result):
+        """Per-step entry of the execution result, pointing at the step's full log"""
+        execution_id = result.get('execution_id')
+        return {
+            'order': order,
+            'node_name': node.name,
+            'status': status,
+            'execution_id': execution_id,
+            'output_size': len(result.get('output') or ''),
+            'log_url': f"/api/executions/nodes/{execution_id}" if execution_id else None
+        }
+    
+    def _result(self, execution, output, steps, error=None, reused_steps=0):
+        """Build the result returned for a finished workflow execution"""
+        result = {
+            'success': execution.status == 'success',
+            'output': execution.output,
+            'output_truncated': output.truncated,
+            'execution_id': execution.id,
+            'log_url': f"/api/executions/workflows/{execution.id}",
+            'steps': steps
+        }
+        if result['success']:
+            result['reused_steps'] = reused_steps
+        else:
+            result['error'] = error
+            result['cancelled'] = execution.status == 'cancelled'
+        return result
+    
+    def _find_reusable(self, workflow, node, config, fingerprint):
+        """Most recent successful run of a step with the same fingerprint, if reusable"""
+        node_type = node_types.get_node_type(node.node_type)
+        if not node_type.cacheable or not fingerprints.outputs_present(config):
+            return None
+        
+        return StepRun.query.join(WorkflowExecution).filter(
+            WorkflowExecution.workflow_id == workflow.id,
+            StepRun.fingerprint == fingerprint,
+            StepRun.status.in_(('success', 'reused')),
+            StepRun.node_execution_id.isnot(None)
+        ).order_by(StepRun.id.desc()).first()
+    
+    def validate_workflow(self, workflow, parameters=None):
+        """Validate every step's merged configuration up front"""
+        errors = []
+        for i, step in enumerate(workflow.steps):
+            config = step.node.get_config()
+            config.update(step.get_parameters())
+            if parameters:
+                config.update(parameters)
+            
+            try:
+                node_types.validate_config(step.node.node_type, config, subject=f"Step {i + 1} ({step.node.name})")
+            except node_types.ConfigValidationError as e:
+                errors.append(str(e))
+        
+        if errors:
+            raise node_types.ConfigValidationError(errors)
+    
+    def _was_cancelled(self, execution, token):
+        """Check the in-process token and the record the cancel endpoint may have updated"""
+        if token.cancelled:
+            return True
+        status = db.session.query(WorkflowExecution.status).filter_by(id=execution.id).scalar()
+        return status == 'cancelled'
+    
+    def _check_stopped(self, execution, token):
+        """Stop between steps if the execution was cancelled or ran out of time"""
+        if self._was_cancelled(execution, token):
+            raise ExecutionCancelled()
+        token.check()
     
     def get_execution_status(self, execution_id):
         """Get the status of a workflow execution"""